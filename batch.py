@@ -0,0 +1,142 @@
+"""Functions for solving or checking many sudoku puzzles at once, optionally across
+processes.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+from itertools import islice
+from typing import Iterable, Iterator
+
+from bitboard import Board, bitboards_from_string, invalid_cells
+from dancing_links import DancingLinksSolution
+from propagation import BitslicedSolution, PropagationSolution
+from solution import BruteForceSolution, MinimumRemainingValuesSolution
+
+# every engine that can solve a board without printing, by name
+ENGINES = {
+    "brute_force": BruteForceSolution,
+    "mrv": MinimumRemainingValuesSolution,
+    "propagation": PropagationSolution,
+    "bitsliced": BitslicedSolution,
+    "dancing_links": DancingLinksSolution,
+}
+
+
+def solve(puzzle: str, engine=DancingLinksSolution) -> str | None:
+    """Solves a single puzzle string without printing anything.
+    Returns the solved puzzle string, or None if it has no solution.
+    """
+    board = Board.from_string(puzzle)
+    if not engine(board).solve():
+        return None
+    return board.to_string()
+
+
+def validate(grid: str) -> list[int]:
+    """Returns the cells that stop a grid string from being a correct solution, see
+    Board.validate. The check works on the bitboards alone, without building a Board.
+    """
+    geometry, values = bitboards_from_string(grid)
+    return invalid_cells(values, geometry)
+
+
+def _map_chunk(function, chunk: list) -> list:
+    """Applies the function to a chunk of items in a worker process."""
+    return [function(item) for item in chunk]
+
+
+def _chunks(items: Iterable, chunksize: int) -> Iterator[list]:
+    """Splits the items into lists of chunksize, reading them lazily."""
+    items = iter(items)
+    while chunk := list(islice(items, chunksize)):
+        yield chunk
+
+
+def map_chunked(
+    function,
+    items: Iterable,
+    workers: int | None = None,
+    chunksize: int = 64,
+    ordered: bool = True,
+) -> Iterator:
+    """Applies a picklable function to every item across a pool of worker processes,
+    sending the items in chunks, and yields the results.
+
+    When ordered is True, results are yielded in the same order as the items.
+    When ordered is False, (index, result) tuples are yielded as soon as each chunk
+    finishes, where index is the position of the item in the input.
+
+    The input is read lazily and at most a few chunks per worker are in flight at a
+    time, so memory stays bounded however many items there are. With workers=1 the
+    items are processed in this process without starting a pool.
+    """
+    if workers == 1:
+        for index, item in enumerate(items):
+            result = function(item)
+            yield result if ordered else (index, result)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as executor:
+        max_in_flight = workers * 4
+        chunks = enumerate(_chunks(items, chunksize))
+        in_flight = deque()
+        pending = {}
+
+        def submit() -> bool:
+            """Submits the next chunk, returning False if there are none left."""
+            for index, chunk in chunks:
+                future = executor.submit(_map_chunk, function, chunk)
+                in_flight.append(future)
+                pending[future] = index * chunksize
+                return True
+            return False
+
+        for _ in range(max_in_flight):
+            if not submit():
+                break
+
+        if ordered:
+            while in_flight:
+                future = in_flight.popleft()
+                del pending[future]
+                submit()
+                yield from future.result()
+        else:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start = pending.pop(future)
+                    submit()
+                    for offset, result in enumerate(future.result()):
+                        yield start + offset, result
+
+
+def solve_many(
+    puzzles: Iterable[str],
+    workers: int | None = None,
+    chunksize: int = 64,
+    ordered: bool = True,
+    engine=DancingLinksSolution,
+) -> Iterator:
+    """Solves puzzle strings across a pool of worker processes and yields the results.
+    Each result is the solved puzzle string, or None if the puzzle has no solution.
+    Ordering, laziness and workers behave as in map_chunked.
+    """
+    yield from map_chunked(partial(solve, engine=engine), puzzles, workers, chunksize, ordered)
+
+
+def validate_many(
+    grids: Iterable[str],
+    workers: int | None = 1,
+    chunksize: int = 1024,
+    ordered: bool = True,
+) -> Iterator:
+    """Checks grid strings and yields the invalid cells of each one, an empty list for
+    a correct solution. A check is cheap enough that sending it to another process
+    can cost more than doing it, so by default no pool is started. Ordering,
+    laziness and workers otherwise behave as in map_chunked.
+    """
+    yield from map_chunked(validate, grids, workers, chunksize, ordered)
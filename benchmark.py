@@ -0,0 +1,170 @@
+"""Benchmarks every solver engine against the puzzle corpora in corpora/.
+
+For each engine and corpus this reports puzzles/sec, p50/p99/max latency per
+puzzle and the search nodes and backtracks per puzzle, and can write
+the results as JSON so that runs from different commits can be compared.
+
+    python benchmark.py --json results.json
+    python benchmark.py --compare results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from batch import ENGINES
+from bitboard import Board
+from limits import SolveLimits
+from loader import load_puzzles
+
+CORPORA_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpora")
+CORPORA = ("easy", "hard", "17-clue", "pathological", "16x16", "25x25")
+
+# engines that can't finish a corpus in reasonable time are skipped by default
+SKIP = {
+    ("brute_force", "17-clue"),
+    ("brute_force", "16x16"),
+    ("brute_force", "25x25"),
+    ("mrv", "16x16"),
+    ("propagation", "16x16"),
+    ("bitsliced", "16x16"),
+}
+
+
+def percentile(sorted_values: list[float], rank: float) -> float:
+    """Returns the value at the percentile rank (0-100) of a sorted list, by nearest rank."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, -(-len(sorted_values) * rank // 100) - 1)
+    return sorted_values[int(index)]
+
+
+def run(engine_name: str, puzzles: list[str], timeout: float) -> dict:
+    """Solves every puzzle with the engine and returns the statistics for the run."""
+    engine = ENGINES[engine_name]
+    latencies = []
+    nodes = []
+    backtracks = []
+    solved = unsolved = timeouts = 0
+    start = time.perf_counter()
+    for puzzle in puzzles:
+        solution = engine(Board.from_string(puzzle))
+        began = time.perf_counter()
+        result = solution.solve_instrumented(limits=SolveLimits(timeout=timeout))
+        latencies.append(time.perf_counter() - began)
+        if result.solved:
+            solved += 1
+        elif result.status == "unsolvable":
+            unsolved += 1
+        else:
+            timeouts += 1
+        nodes.append(result.stats.nodes)
+        backtracks.append(result.stats.backtracks)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "engine": engine_name,
+        "puzzles": len(puzzles),
+        "solved": solved,
+        "unsolved": unsolved,
+        "timeouts": timeouts,
+        "seconds": round(elapsed, 4),
+        "puzzles_per_sec": round(len(puzzles) / elapsed, 2) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        "nodes_per_puzzle": round(sum(nodes) / len(puzzles), 1),
+        "backtracks_per_puzzle": round(sum(backtracks) / len(puzzles), 1),
+    }
+
+
+def _commit() -> str | None:
+    """Returns the current git commit hash, if there is one."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Returns a line for every engine and corpus whose puzzles/sec dropped by more
+    than threshold (a fraction) compared to the baseline results.
+    """
+    previous = {
+        (row["engine"], row["corpus"]): row["puzzles_per_sec"] for row in baseline["results"]
+    }
+    regressions = []
+    for row in results["results"]:
+        before = previous.get((row["engine"], row["corpus"]))
+        after = row["puzzles_per_sec"]
+        if before and after and after < before * (1 - threshold):
+            regressions.append(
+                f"{row['engine']} on {row['corpus']}: {before} -> {after} puzzles/sec"
+            )
+    return regressions
+
+
+def main() -> int:
+    """Runs the benchmarks from the command line. Returns the exit code."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--corpora", nargs="+", default=list(CORPORA))
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds per puzzle")
+    parser.add_argument("--all", action="store_true", help="don't skip slow combinations")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="results file to check for regressions against")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    results = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": [],
+    }
+    print(
+        f"{'engine':<14} {'corpus':<13} {'puzzles/s':>10} {'p50 ms':>9} "
+        f"{'p99 ms':>9} {'max ms':>9} {'nodes':>9} {'backtracks':>11} {'timeouts':>9}"
+    )
+    for corpus in args.corpora:
+        path = corpus if os.path.exists(corpus) else os.path.join(CORPORA_DIRECTORY, f"{corpus}.txt")
+        puzzles = list(load_puzzles(path))
+        for engine in args.engines:
+            if (engine, corpus) in SKIP and not args.all:
+                continue
+            row = {"corpus": corpus, **run(engine, puzzles, args.timeout)}
+            results["results"].append(row)
+            print(
+                f"{engine:<14} {corpus:<13} {row['puzzles_per_sec']:>10} {row['p50_ms']:>9} "
+                f"{row['p99_ms']:>9} {row['max_ms']:>9} {row['nodes_per_puzzle']:>9} "
+                f"{row['backtracks_per_puzzle']:>11} {row['timeouts']:>9}"
+            )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for line in regressions:
+            print(f"regression: {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,48 +1,209 @@
 """Custom classes for internally representing the sudoku game as bitboards."""
 
+from typing import Iterable
+
 from solution import BruteForceSolution
-from enums import Squares, Cells, Rows, Columns
+from geometry import STANDARD, Geometry, geometry_for_box_size, geometry_for_length
+
+
+def bitboards_from_bytes(digits: bytes, geometry: Geometry) -> tuple[int, ...]:
+    """Returns the values of the bitboards, in the order Board.snapshot returns them,
+    of a puzzle given as ASCII bytes in the format of Board.from_string.
+    """
+    try:
+        return tuple(int(digits.translate(table), 2) for table in geometry.digit_tables)
+    except ValueError:
+        symbols = b"0." + geometry.symbols.encode()
+        invalid = digits.translate(None, symbols)[:1].decode("ascii", "replace")
+        raise ValueError(f"Invalid symbol {invalid!r}") from None
+
+
+def bitboards_from_string(puzzle: str) -> tuple[Geometry, tuple[int, ...]]:
+    """Returns the geometry of a puzzle string and the values of its bitboards, in the
+    order Board.snapshot returns them, without building a Board. See Board.from_string.
+    """
+    geometry = geometry_for_length(len(puzzle))
+    try:
+        digits = puzzle.encode("ascii")
+    except UnicodeEncodeError as error:
+        raise ValueError(f"Invalid symbol {puzzle[error.start]!r}") from None
+    return geometry, bitboards_from_bytes(digits, geometry)
+
+
+def _filled_rows(value: int, geometry: Geometry) -> int:
+    """Returns the top bit of every row of the bitboard value that is not empty, by
+    adding the low bits of every row so that any bit in them carries into the top.
+    """
+    low_bits, top_bits = geometry.row_low_bits, geometry.row_top_bits
+    return (((value & low_bits) + low_bits) | value) & top_bits
+
+
+def _fold_columns(value: int, geometry: Geometry) -> int:
+    """Returns the first row of the bitboard value with every other row ORed onto it,
+    which has a bit for every column that is not empty, by folding the rows in half.
+    """
+    size = geometry.size
+    rows = size
+    while rows > 1:
+        half = rows // 2
+        value |= value >> (size * (rows - half))
+        rows -= half
+    return value & geometry.all_candidates
+
+
+def _fold_squares(value: int, geometry: Geometry) -> int:
+    """Returns the first cell of every square of the bitboard value that is not
+    empty, by folding each band onto its first row, then each square onto its first
+    cell.
+    """
+    size, box_size = geometry.size, geometry.box_size
+    bands = value
+    for row in range(1, box_size):
+        bands |= value >> (size * row)
+    bands &= geometry.band_rows
+    squares = bands
+    for column in range(1, box_size):
+        squares |= bands >> column
+    return squares & geometry.square_corners
+
+
+def _is_valid(values: tuple[int, ...], geometry: Geometry) -> bool:
+    """Returns True if the bitboard values are a complete, valid grid.
+
+    A number with exactly size bits, and at least one in every row, column and
+    square, has exactly one in each. Rather than ANDing the bitboard with every unit
+    mask, each test is a few whole-board operations: adding the low bits of every
+    row carries into the top bit of each row that is not empty, and ORing shifted
+    copies folds the rows onto the first row for the columns, and each square onto
+    its first cell for the squares. If every number passes and together they cover
+    the board, the bitboards also partition the cells.
+    """
+    if values[0]:
+        return False
+    size = geometry.size
+    covered = 0
+    for value in values[1:]:
+        if value.bit_count() != size:
+            return False
+        if _filled_rows(value, geometry) != geometry.row_top_bits:
+            return False
+        if _fold_columns(value, geometry) != geometry.all_candidates:
+            return False
+        if _fold_squares(value, geometry) != geometry.square_corners:
+            return False
+        covered |= value
+    return covered == geometry.full_mask
+
+
+def invalid_cells(values: tuple[int, ...], geometry: Geometry = STANDARD) -> list[int]:
+    """Returns the cells that stop the bitboard values (see Board.snapshot) from being
+    a solved grid: blank cells, cells that are on more than one bitboard or on none,
+    and cells holding a number that appears more than once in one of their units.
+    An empty list means every unit holds every number exactly once.
+    """
+    if _is_valid(values, geometry):
+        return []
+
+    invalid = values[0]
+    seen = 0
+    for value in values:
+        invalid |= seen & value
+        seen |= value
+    invalid |= ~seen
+    unit_masks = geometry.row_masks + geometry.column_masks + geometry.square_masks
+    for value in values[1:]:
+        for mask in unit_masks:
+            bits = value & mask
+            if bits & (bits - 1):
+                invalid |= bits
+    invalid &= geometry.full_mask
+
+    cells = []
+    while invalid:
+        bit = invalid & -invalid
+        cells.append(bit.bit_length() - 1)
+        invalid ^= bit
+    return cells
+
+
+def unit_cover(value: int, geometry: Geometry = STANDARD) -> int:
+    """Returns the cells that share a row, column or square with any cell of the
+    bitboard value, including those cells themselves.
+
+    Each unit type takes a few whole-board operations, the same way as the checks of
+    invalid_cells: the top bit of every row that is not empty is found by carrying,
+    and subtracting the start of the row from it fills the row; the rows are folded
+    onto the first row and multiplied back out for the columns; and each square is
+    folded onto its first cell and multiplied back out over the square. None of the
+    multiplications carry, since the spread out bits never overlap.
+    """
+    tops = _filled_rows(value, geometry)
+    cover = (tops - (tops >> (geometry.size - 1))) | tops
+    cover |= _fold_columns(value, geometry) * geometry.row_starts
+    return cover | _fold_squares(value, geometry) * geometry.square_block
+
+
+def _print_grid(symbols, box_size: int) -> None:
+    """Prints the symbols, given top left first, as a grid with lines between the squares."""
+    size = box_size * box_size
+    horizontal_line = " " + "—" * (2 * size + 2 * box_size - 1)
+    for i, symbol in enumerate(symbols):
+        if i % size == 0:
+            print()
+            if i % (size * box_size) == 0:
+                print(horizontal_line)
+
+            print("|", end="")
+
+        print(f" {symbol}", end="")
+
+        if (i + 1) % box_size == 0:
+            print(" |", end="")
+    print(f"\n{horizontal_line} \n")
 
 
 class Bitboard:
     """Each number of the sudoku puzzle has its own bitboard.
-    The bitboard is an 81 digit number, conceptualized in binary.
-    The 81 digits represent the cells of the sudoku board,
+    The bitboard is a number conceptualized in binary, with one
+    digit per cell of the board: 81 digits on a 9x9 board, 256 on
+    16x16 and 625 on 25x25. The digits represent the cells
     from right to left, bottom to top. This is backwards from
     the way we naturally read in order to make bitwise
     operations and reasoning easy.
     """
 
-    def __init__(self, number: int) -> None:
+    __slots__ = ("_number", "_value", "_geometry")
+
+    def __init__(self, number: int, geometry: Geometry = STANDARD) -> None:
         self._number = number
         self._value = 0
+        self._geometry = geometry
 
         # since zero represents a blank cell, and we want to initialize the board
         # completely blank, we turn on all the bits in the zero bitboard
         if self._number == 0:
-            for cell in Cells:
-                self.set_bit(cell.value)
+            self._value = geometry.full_mask
 
     @property
     def decimal_value(self) -> int:
-        """Returns the decimal number equivalent to the 81 digit binary number."""
+        """Returns the decimal number equivalent to the binary number."""
         return self._value
 
     @property
     def binary_value(self) -> str:
-        """Returns the 81 digit binary number with leading zeroes."""
-        return format(self._value, "b").zfill(81)
+        """Returns the binary number with leading zeroes, one digit per cell."""
+        return format(self._value, "b").zfill(self._geometry.cell_count)
 
     @property
     def number(self) -> int:
-        """Returns the number (1-9) that this bitboard represents."""
+        """Returns the number, 1 up to the board size, that this bitboard represents."""
         return self._number
 
     def set_bit(self, cell: int) -> None:
         """Turns on the bit at the cell index, if it is off.
         Otherwise, do nothing.
         """
-        assert 0 <= cell <= 80, "Invalid cell index"
+        assert 0 <= cell < self._geometry.cell_count, "Invalid cell index"
         if not self._value & (1 << cell):
             self._value += 1 << cell
 
@@ -50,7 +211,7 @@ class Bitboard:
         """Turns off the bit at the cell index, if it is on.
         Otherwise, do nothing.
         """
-        assert 0 <= cell <= 80, "Invalid cell index"
+        assert 0 <= cell < self._geometry.cell_count, "Invalid cell index"
         if self._value & (1 << cell):
             self._value -= 1 << cell
 
@@ -58,49 +219,20 @@ class Bitboard:
         return f"<bitboard #{self._number}: {self.decimal_value}>"
 
     def print_bitboard(self) -> None:
-        """Prints the bitboard in 9x9 form."""
-        horizontal_line = " ———————————————————————"
-        for i, number in enumerate(self.binary_value):
-            if i % 9 == 0:
-                print()
-                if i % 27 == 0:
-                    print(horizontal_line)
-
-                print("|", end="")
-
-            print(f" {number}", end="")
-
-            if (i + 1) % 3 == 0 or (i + 1) % 6 == 0:
-                print(" |", end="")
-        print(f"\n{horizontal_line} \n")
+        """Prints the bitboard in 9x9 form, or the size of its board."""
+        _print_grid(self.binary_value, self._geometry.box_size)
 
     def is_in_row(self, row: int) -> bool:
         """Returns a boolean indicating if the number is in the row."""
-        for index in list(Rows)[row].indices:
-            if self._value & (1 << index):
-                return True
-        return False
+        return bool(self._value & self._geometry.row_masks[row])
 
     def is_in_column(self, column: int) -> bool:
         """Returns a boolean indicating if the number is in the column."""
-        for index in list(Columns)[column].indices:
-            if self._value & (1 << index):
-                return True
-        return False
+        return bool(self._value & self._geometry.column_masks[column])
 
     def is_in_square(self, square: int) -> bool:
-        """Returns a boolean indicating if the number is in the square.
-        First, we get the rows and column indices for the square.
-        Then, we check if the number is in one of those rows.
-        If it isn't, we return False.
-        If it is, we check if it is also in one of the columns.
-        """
-        square = list(Squares)[square]
-        for indices in square.indices:
-            for index in indices:
-                if self._value & (1 << index):
-                    return True
-        return False
+        """Returns a boolean indicating if the number is in the square."""
+        return bool(self._value & self._geometry.square_masks[square])
 
     def is_in_cell(self, cell: int) -> bool:
         """Returns True if the number is in the cell, False otherwise."""
@@ -124,70 +256,84 @@ class Bitboard:
 
 
 class Board:
-    """Class that represents the entirety of the sudoku board."""
-
-    def __init__(self) -> None:
-        self._zero = Bitboard(0)
-        self._one = Bitboard(1)
-        self._two = Bitboard(2)
-        self._three = Bitboard(3)
-        self._four = Bitboard(4)
-        self._five = Bitboard(5)
-        self._six = Bitboard(6)
-        self._seven = Bitboard(7)
-        self._eight = Bitboard(8)
-        self._nine = Bitboard(9)
+    """Class that represents the entirety of the sudoku board.
+
+    Alongside the bitboards, one per number plus one for blank cells, the board
+    keeps the number in each cell and the candidate state, all of which fill_cell
+    updates together.
+    Changes can be recorded on a trail so that a solver can take a checkpoint,
+    try some placements, and roll back to the checkpoint in time proportional to
+    the number of changes rather than clearing cells one by one.
+
+    The board is 9x9 by default. Passing a box size of 2, 4 or 5 makes a 4x4,
+    16x16 or 25x25 board, with all the lookup tables taken from the Geometry for
+    that box size.
+    """
+
+    __slots__ = (
+        "_geometry",
+        "_cell_units",
+        "_peer_indices",
+        "_peer_masks",
+        "_bitboards",
+        "_cells",
+        "_unit_counts",
+        "_unit_masks",
+        "_candidates",
+        "_eliminated",
+        "_trail",
+        "_checkpoints",
+        "_solution",
+    )
+
+    def __init__(self, box_size: int = 3) -> None:
+        geometry = self._geometry = geometry_for_box_size(box_size)
+        # the tables used on every placement are kept on the board itself, to save
+        # looking them up on the geometry each time
+        self._cell_units = geometry.cell_units
+        self._peer_indices = geometry.peer_indices
+        self._peer_masks = geometry.peer_masks
+        self._bitboards = tuple(
+            Bitboard(number, geometry) for number in range(geometry.size + 1)
+        )
+
+        # the candidate state is maintained incrementally by fill_cell, so that
+        # candidate queries are lookups instead of scans over the bitboards
+        self._cells = [0] * geometry.cell_count
+        self._unit_counts = [[0] * (geometry.size + 1) for _ in range(geometry.unit_count)]
+        self._unit_masks = [0] * geometry.unit_count
+        self._candidates = [geometry.all_candidates] * geometry.cell_count
+        self._eliminated = [0] * geometry.cell_count
+
+        # changes are only recorded while a checkpoint is outstanding
+        self._trail = None
+        self._checkpoints = []
 
         self._solution = BruteForceSolution(self)
 
     @property
-    def _bitboards(self) -> tuple[Bitboard]:
-        """Returns a tuple of all the bitboards."""
-        bitboards = (
-            self._zero,
-            self._one,
-            self._two,
-            self._three,
-            self._four,
-            self._five,
-            self._six,
-            self._seven,
-            self._eight,
-            self._nine,
-        )
-        return bitboards
+    def geometry(self) -> Geometry:
+        """Returns the lookup tables for the size of the board."""
+        return self._geometry
 
     def bitboard(self, number: int) -> Bitboard:
         """Returns the bitboard corresponding to the number argument."""
-        assert 0 <= number <= 9, "Invalid bitboard selection"
+        assert 0 <= number <= self._geometry.size, "Invalid bitboard selection"
         return self._bitboards[number]
 
     def to_list(self) -> list[int]:
-        """Combines all bitboards into a list of 81 integers. 0 represents a blank cell."""
-        numbers = [None] * 81
-        for bitboard in self._bitboards:
-            for cell in Cells:
-                if bitboard.decimal_value & 1 << cell.value:
-                    numbers[cell.value] = bitboard.number
-        return numbers
+        """Returns the number in each cell as a list of integers, one per cell, indexed
+        by cell. 0 represents a blank cell.
+        """
+        return list(self._cells)
 
     def print_board(self) -> None:
-        """Prints the sudoku board in 9x9 form."""
-        horizontal_line = " ———————————————————————"
-        numbers = self.to_list()
-        for i, number in enumerate(numbers[::-1]):
-            if i % 9 == 0:
-                print()
-                if i % 27 == 0:
-                    print(horizontal_line)
-
-                print("|", end="")
-
-            print(f" {number}", end="")
-
-            if (i + 1) % 3 == 0 or (i + 1) % 6 == 0:
-                print(" |", end="")
-        print(f"\n{horizontal_line} \n")
+        """Prints the sudoku board as a grid of its size."""
+        if self._geometry.size > 9:
+            numbers = self.to_string(blank="0")
+        else:
+            numbers = self.to_list()[::-1]
+        _print_grid(numbers, self._geometry.box_size)
 
     def __repr__(self) -> str:
         """String representation of Board object."""
@@ -198,32 +344,303 @@ class Board:
 
     def cell_is_empty(self, cell: int) -> bool:
         """Returns True if the cell is empty (0), False otherwise."""
-        return bool(self.bitboard(0).decimal_value & (1 << cell))
+        return not self._cells[cell]
 
     def cell_can_contain(self, cell: int, number: int) -> bool:
         """Returns True if the given number would not violate any constraints
         if it were placed in the cell. This should only be called if you already
-        know that the cell is empty."""
-        cell = list(Cells)[cell]
-        return (
-            self.bitboard(number).not_in_row(cell.row)
-            and self.bitboard(number).not_in_column(cell.column)
-            and self.bitboard(number).not_in_square(cell.square)
-        )
+        know that the cell is empty.
+
+        The row, column and square of the cell are exactly the cell and its peers,
+        so the check is a single AND against the precomputed peer mask.
+        """
+        return not self._bitboards[number]._value & (self._peer_masks[cell] | 1 << cell)
 
     def get_cell_value(self, cell: int) -> int:
-        """Returns the number 1-9 that a cell currently contains, or 0 if it is empty."""
-        for bitboard in self._bitboards:
-            if bitboard.decimal_value & (1 << cell):
-                return bitboard.number
-        return 0
+        """Returns the number, 1 up to the board size, that a cell currently contains,
+        or 0 if it is empty.
+        """
+        return self._cells[cell]
+
+    @classmethod
+    def from_string(cls, puzzle: str) -> "Board":
+        """Returns a board built from a puzzle string with one character per cell, read
+        left to right, top to bottom, with '.' or '0' for a blank cell. Since the last
+        cell is the top left cell (see Cells), the string with each character mapped
+        to a 1 or a 0 is exactly the binary value of a bitboard. Every bitboard is
+        built that way directly instead of filling the cells one at a time.
+
+        The length gives the size: 16, 81, 256 or 625 characters for a 4x4, 9x9,
+        16x16 or 25x25 puzzle, with the numbers past 9 written as the letters A-P
+        (see SYMBOLS).
+        """
+        return cls.from_snapshot(bitboards_from_string(puzzle)[1])
+
+    def to_string(self, blank: str = ".") -> str:
+        """Returns the board as a string, one character per cell, in the format
+        from_string reads.
+        """
+        symbols = (blank, *self._geometry.symbols)
+        return "".join(symbols[number] for number in reversed(self._cells))
+
+    def snapshot(self) -> tuple[int, ...]:
+        """Returns the values of the bitboards, which is all that is needed to
+        rebuild the board with from_snapshot. Eliminations are not included.
+        """
+        return tuple(bitboard._value for bitboard in self._bitboards)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: tuple[int, ...]) -> "Board":
+        """Returns a board rebuilt from the bitboard values returned by snapshot."""
+        board = cls(round((len(snapshot) - 1) ** 0.5))
+        cells = board._cells
+        for bitboard, value in zip(board._bitboards, snapshot):
+            bitboard._value = value
+            number = bitboard.number
+            while value:
+                bit = value & -value
+                cells[bit.bit_length() - 1] = number
+                value ^= bit
+        board._rebuild_candidates()
+        return board
+
+    def copy(self) -> "Board":
+        """Returns an independent copy of the board, including its eliminations,
+        for solvers that explore branches side by side. The trail is not copied.
+        """
+        board = Board.__new__(Board)
+        board._geometry = self._geometry
+        board._cell_units = self._cell_units
+        board._peer_indices = self._peer_indices
+        board._peer_masks = self._peer_masks
+        board._bitboards = tuple(
+            Bitboard(number, self._geometry) for number in range(len(self._bitboards))
+        )
+        for bitboard, source in zip(board._bitboards, self._bitboards):
+            bitboard._value = source._value
+        board._cells = list(self._cells)
+        board._unit_counts = [list(counts) for counts in self._unit_counts]
+        board._unit_masks = list(self._unit_masks)
+        board._candidates = list(self._candidates)
+        board._eliminated = list(self._eliminated)
+        board._trail = None
+        board._checkpoints = []
+        board._solution = BruteForceSolution(board)
+        return board
+
+    def _rebuild_candidates(self) -> None:
+        """Recomputes the unit counts, unit masks and candidate masks from scratch."""
+        geometry = self._geometry
+        self._unit_counts = [[0] * (geometry.size + 1) for _ in range(geometry.unit_count)]
+        self._unit_masks = [0] * geometry.unit_count
+        for cell, number in enumerate(self._cells):
+            if number:
+                for unit in geometry.cell_units[cell]:
+                    self._unit_counts[unit][number] += 1
+                    self._unit_masks[unit] |= 1 << (number - 1)
+        for cell in range(geometry.cell_count):
+            self._update_candidates(cell)
 
     def fill_cell(self, cell: int, number: int) -> None:
         """Places the number in the cell on the board by setting the bit in the
-        correct bitboard, and also resetting the bit in all other bitboards.
+        correct bitboard, and also resetting the bit in the bitboard of the number
+        that was there before. Filling a cell with 0 clears it.
         """
-        for bitboard in self._bitboards:
-            if bitboard.number != number:
-                bitboard.reset_bit(cell)
+        previous = self._cells[cell]
+        if previous == number:
+            return
+        if self._trail is not None:
+            self._trail.append((cell, previous, None))
+        self._place(cell, number, previous)
+
+    def fill_cells(self, placements: Iterable[tuple[int, int]]) -> None:
+        """Fills cells in bulk from pairs of a number and a bitboard value of the empty
+        cells to put it in. While no checkpoint is open the bitboards are updated
+        whole and the candidates rebuilt once at the end, which is quicker than
+        filling many cells one at a time; otherwise each cell goes through fill_cell
+        so that it is recorded on the trail.
+        """
+        recording = self._trail is not None
+        for number, cells in placements:
+            if not recording:
+                self._bitboards[0]._value &= ~cells
+                self._bitboards[number]._value |= cells
+            while cells:
+                bit = cells & -cells
+                if recording:
+                    self.fill_cell(bit.bit_length() - 1, number)
+                else:
+                    self._cells[bit.bit_length() - 1] = number
+                cells ^= bit
+        if not recording:
+            self._rebuild_candidates()
+
+    def _place(self, cell: int, number: int, previous: int) -> None:
+        """Moves the cell from the previous number to the new one without recording it."""
+        bit = 1 << cell
+        self._bitboards[previous]._value &= ~bit
+        self._bitboards[number]._value |= bit
+        self._cells[cell] = number
+
+        # update the digit counts of the row, column and square of the cell
+        for unit in self._cell_units[cell]:
+            counts = self._unit_counts[unit]
+            if previous:
+                counts[previous] -= 1
+                if not counts[previous]:
+                    self._unit_masks[unit] &= ~(1 << (previous - 1))
+            if number:
+                counts[number] += 1
+                self._unit_masks[unit] |= 1 << (number - 1)
+
+        # only the cell and its peers can have had their candidates changed
+        self._update_candidates(cell)
+        for peer in self._peer_indices[cell]:
+            self._update_candidates(peer)
+
+    def checkpoint(self) -> int:
+        """Starts recording changes, if it hasn't already, and returns a mark that
+        rollback can later return the board to. Every checkpoint should be closed by
+        a call to rollback or commit; closing one also closes any opened after it.
+        """
+        if self._trail is None:
+            self._trail = []
+        self._checkpoints.append(len(self._trail))
+        return len(self._checkpoints) - 1
+
+    @property
+    def checkpoint_depth(self) -> int:
+        """Returns how many checkpoints are open, which is also the mark that the
+        next call to checkpoint will return.
+        """
+        return len(self._checkpoints)
+
+    def rollback(self, mark: int) -> None:
+        """Undoes every placement and elimination made since the checkpoint that
+        returned the mark, and closes that checkpoint.
+        """
+        trail = self._trail
+        length = self._checkpoints[mark]
+        while len(trail) > length:
+            cell, previous, eliminated = trail.pop()
+            if eliminated is None:
+                self._place(cell, previous, self._cells[cell])
             else:
-                bitboard.set_bit(cell)
+                self._eliminated[cell] = eliminated
+                self._update_candidates(cell)
+        self._close_checkpoint(mark)
+
+    def commit(self, mark: int) -> None:
+        """Keeps every change made since the checkpoint that returned the mark, and
+        closes that checkpoint. The changes stay on the trail while an outer
+        checkpoint is still open, so that it can undo them.
+        """
+        assert mark < len(self._checkpoints), "Invalid checkpoint mark"
+        self._close_checkpoint(mark)
+
+    def _close_checkpoint(self, mark: int) -> None:
+        """Closes the checkpoint and any opened after it, and stops recording changes
+        once the outermost checkpoint is closed.
+        """
+        del self._checkpoints[mark:]
+        if not self._checkpoints:
+            self._trail = None
+
+    def validate(self) -> list[int]:
+        """Returns the cells that stop the board from being a solved grid, checked on
+        the bitboards alone (see invalid_cells). An empty list means the board is
+        completely and correctly filled in.
+        """
+        return invalid_cells(self.snapshot(), self._geometry)
+
+    def positions(self, number: int) -> int:
+        """Returns a bitboard of the empty cells the number can still go in: the
+        blank cells outside every row, column and square the number is already in,
+        worked out on the whole board at once (see unit_cover), less any cells the
+        number has been eliminated from.
+        """
+        assert 1 <= number <= self._geometry.size, "Invalid number"
+        positions = self._bitboards[0]._value & ~unit_cover(
+            self._bitboards[number]._value, self._geometry
+        )
+        if any(self._eliminated):
+            bit = 1 << (number - 1)
+            for cell, eliminated in enumerate(self._eliminated):
+                if eliminated & bit:
+                    positions &= ~(1 << cell)
+        return positions
+
+    def has_conflicts(self) -> bool:
+        """Returns True if a number appears more than once in a row, column or square,
+        in which case the board can't be solved.
+        """
+        return any(count > 1 for counts in self._unit_counts for count in counts[1:])
+
+    def _update_candidates(self, cell: int) -> None:
+        """Recomputes the candidate mask of a cell from the digits used in its units."""
+        if self._cells[cell]:
+            self._candidates[cell] = 0
+        else:
+            row, column, square = self._cell_units[cell]
+            unit_masks = self._unit_masks
+            self._candidates[cell] = self._geometry.all_candidates & ~(
+                unit_masks[row]
+                | unit_masks[column]
+                | unit_masks[square]
+                | self._eliminated[cell]
+            )
+
+    def candidates(self, cell: int) -> int:
+        """Returns the candidate mask of the cell, where bit n - 1 is on if the
+        number n could be placed in the cell without violating any constraints.
+        Filled cells have no candidates.
+        """
+        return self._candidates[cell]
+
+    def eliminate(self, cell: int, mask: int) -> bool:
+        """Removes the numbers in the mask from the candidates of the cell, for
+        deductions that can't be expressed by placing a number. Eliminations are
+        kept when cells are filled or cleared later, so they should only be made
+        from facts that hold for every solution of the current board. They are
+        undone by rollback like placements are.
+        Returns True if any candidate was removed.
+        """
+        eliminated = self._eliminated[cell]
+        if not ~eliminated & mask:
+            return False
+        if self._trail is not None:
+            self._trail.append((cell, 0, eliminated))
+        removed = self._candidates[cell] & mask
+        self._eliminated[cell] = eliminated | mask
+        self._candidates[cell] &= ~mask
+        return bool(removed)
+
+    def most_constrained_cell(self) -> int | None:
+        """Returns the empty cell with the fewest candidates, the first one found if
+        there is a tie, or None if the board is full. Stops looking as soon as it
+        finds a cell with zero or one candidates, since no other cell can be a better
+        choice. This is the cell that search solvers branch on.
+        """
+        best_cell = None
+        best_count = self._geometry.size + 1
+        candidates = self._candidates
+        for cell, number in enumerate(self._cells):
+            if not number:
+                count = candidates[cell].bit_count()
+                if count < best_count:
+                    best_cell = cell
+                    best_count = count
+                    if count <= 1:
+                        break
+        return best_cell
+
+    def candidate_count(self, cell: int) -> int:
+        """Returns the number of candidates for the cell."""
+        return self._candidates[cell].bit_count()
+
+    def unit_count(self, unit: int, number: int) -> int:
+        """Returns how many times the number appears in the unit. Units are
+        numbered 0-26: rows are 0-8, columns are 9-17 and squares are 18-26.
+        Larger boards number their units the same way (see Geometry).
+        """
+        return self._unit_counts[unit][number]
@@ -0,0 +1,307 @@
+"""Classes for mapping sudoku puzzles to a canonical form and caching their solutions.
+
+Two puzzles are equivalent if one can be turned into the other by relabelling the
+digits, permuting the rows within a band or the columns within a stack, permuting
+the bands or the stacks, and transposing. Equivalent puzzles have equivalent
+solutions, so a solution found for one of them answers all of them.
+"""
+
+from collections import OrderedDict
+from itertools import permutations
+from operator import itemgetter
+
+_TRIPLES = tuple(permutations(range(3)))
+
+# every permutation of the columns that keeps stacks together, 6 ** 4 of them
+_COLUMN_ORDERS = tuple(
+    tuple(stack * 3 + _TRIPLES[within[stack]][i] for stack in stacks for i in range(3))
+    for stacks in _TRIPLES
+    for within in (
+        (a, b, c) for a in range(6) for b in range(6) for c in range(6)
+    )
+)
+# below this many states, duplicates are cheaper to carry than to find
+_DEDUPLICATE_ABOVE = 2048
+
+# itemgetters that read a row in each column order at C speed
+_COLUMN_GETTERS = tuple(itemgetter(*columns) for columns in _COLUMN_ORDERS)
+
+
+class Transform:
+    """A relabelling and rearrangement of the cells that maps a puzzle to its
+    canonical form. Positions are indices into 81 character puzzle strings.
+
+    positions[i] is the position in the original puzzle that ends up at position i,
+    and labels[n] is the canonical digit that the original digit n becomes.
+    """
+
+    __slots__ = ("positions", "labels")
+
+    def __init__(self, positions: tuple[int, ...], labels: tuple[int, ...]) -> None:
+        self.positions = positions
+        self.labels = labels
+
+    def apply(self, puzzle: str) -> str:
+        """Returns the puzzle string rearranged and relabelled into canonical form."""
+        labels = self.labels
+        return "".join(
+            str(labels[int(puzzle[position])]) if puzzle[position] not in ".0" else "."
+            for position in self.positions
+        )
+
+    def invert(self, canonical: str) -> str:
+        """Returns the string mapped back from canonical form to the original layout."""
+        inverse = [0] * 10
+        for number, label in enumerate(self.labels):
+            inverse[label] = number
+        original = ["."] * 81
+        for i, position in enumerate(self.positions):
+            if canonical[i] not in ".0":
+                original[position] = str(inverse[int(canonical[i])])
+        return "".join(original)
+
+
+def canonicalize(puzzle: str) -> tuple[str, Transform]:
+    """Returns the canonical form of an 81 character puzzle string, and the transform
+    that produces it. The canonical form is the lexicographically smallest string
+    (blanks first) over every equivalent arrangement, with digits numbered in order
+    of first appearance.
+
+    The rows are chosen one at a time. For each candidate arrangement we keep the
+    transposition, the rows chosen so far, the column order and the relabelling,
+    and after each row only the arrangements giving the smallest prefix survive.
+    """
+    digits = [0 if character in ".0" else int(character) for character in puzzle]
+    grids = (
+        [tuple(digits[row * 9 : row * 9 + 9]) for row in range(9)],
+        [tuple(digits[column * 9 + row] for column in range(9)) for row in range(9)],
+    )
+    states = _first_rows(grids)
+    for step in range(1, 9):
+        best = None
+        survivors = []
+        for grid, rows, getter, labels, next_label in states:
+            if step % 3:
+                # the rest of the band the previous row came from
+                band = rows[-1] // 3
+                choices = [band * 3 + i for i in range(3) if band * 3 + i not in rows]
+            else:
+                used = {row // 3 for row in rows}
+                choices = [band * 3 + i for band in range(3) if band not in used for i in range(3)]
+            for row in choices:
+                line, new_labels, label = _relabel(getter(grids[grid][row]), labels, next_label)
+                if best is None or line < best:
+                    best = line
+                    survivors = []
+                if line == best:
+                    survivors.append((grid, rows + (row,), getter, new_labels, label))
+        states = _deduplicate(survivors, grids)
+
+    grid, rows, getter, labels, next_label = states[0]
+    labels = list(labels)
+    # digits that don't appear in the puzzle get the remaining labels in order
+    for number in range(1, 10):
+        if not labels[number]:
+            labels[number] = next_label
+            next_label += 1
+    columns = _COLUMN_ORDERS[_COLUMN_GETTERS.index(getter)]
+    positions = tuple(
+        row * 9 + column if grid == 0 else column * 9 + row
+        for row in rows
+        for column in columns
+    )
+    transform = Transform(positions, tuple(labels))
+    return transform.apply(puzzle), transform
+
+
+def _relabel(
+    values: tuple[int, ...], labels: tuple[int, ...], next_label: int
+) -> tuple[list[int], tuple[int, ...], int]:
+    """Relabels a row, giving digits not seen yet the next free labels. Returns the
+    relabelled row, the updated labels and the next free label.
+    """
+    new_labels = list(labels)
+    line = []
+    for number in values:
+        if number:
+            if not new_labels[number]:
+                new_labels[number] = next_label
+                next_label += 1
+            line.append(new_labels[number])
+        else:
+            line.append(0)
+    return line, tuple(new_labels), next_label
+
+
+def _first_rows(grids) -> list[tuple]:
+    """Returns the arrangements that give the smallest first row, as
+    (grid, rows, column getter, labels, next free label) states.
+
+    When no row repeats a digit, a relabelled row only depends on which of its cells
+    are blank, so the smallest first rows are found by comparing blank patterns
+    for every column order, without relabelling each one.
+    """
+    distinct = all(
+        len(set(row) - {0}) == sum(1 for number in row if number)
+        for grid in grids
+        for row in grid
+    )
+    best = None
+    candidates = []
+    for grid in range(2):
+        for row in range(9):
+            values = grids[grid][row]
+            if distinct:
+                # the smallest arrangement of a blank pattern is each stack sorted,
+                # then the stacks sorted, so only the rows that tie for it need the
+                # column orders that give it looked for
+                pattern = tuple(1 if number else 0 for number in values)
+                key = sum(sorted(tuple(sorted(pattern[i : i + 3])) for i in (0, 3, 6)), ())
+                if best is None or key < best:
+                    best = key
+                    candidates = []
+                if key == best:
+                    candidates.extend(
+                        (grid, row, getter)
+                        for getter in _COLUMN_GETTERS
+                        if getter(pattern) == key
+                    )
+                continue
+            for getter in _COLUMN_GETTERS:
+                key = _relabel(getter(values), (0,) * 10, 1)[0]
+                if best is None or key < best:
+                    best = key
+                    candidates = []
+                if key == best:
+                    candidates.append((grid, row, getter))
+    states = []
+    for grid, row, getter in candidates:
+        _, labels, next_label = _relabel(getter(grids[grid][row]), (0,) * 10, 1)
+        states.append((grid, (row,), getter, labels, next_label))
+    return _deduplicate(states, grids)
+
+
+def _deduplicate(states: list[tuple], grids) -> list[tuple]:
+    """Drops states whose remaining rows would be read exactly the same way as those
+    of a state already kept. What happens next only depends on the labels and on
+    the values of the rows left, as seen through the column order and grouped into
+    what is left of the current band and the other bands. Without this, nearly
+    blank puzzles, where almost every arrangement ties, would be far too slow.
+    Small lists are returned as they are, since checking them costs more than
+    carrying the duplicates.
+    """
+    if len(states) <= _DEDUPLICATE_ABOVE:
+        return states
+    seen = set()
+    kept = []
+    for state in states:
+        grid, rows, getter, labels, _ = state
+        values = grids[grid]
+        band = rows[-1] // 3 if len(rows) % 3 else None
+        current = sorted(
+            getter(values[row]) for row in range(9) if row // 3 == band and row not in rows
+        )
+        used = {row // 3 for row in rows}
+        others = sorted(
+            tuple(sorted(getter(values[other * 3 + i]) for i in range(3)))
+            for other in range(3)
+            if other not in used
+        )
+        signature = (labels, tuple(current), tuple(others))
+        if signature not in seen:
+            seen.add(signature)
+            kept.append(state)
+    return kept
+
+
+def canonical_key(board) -> str:
+    """Returns the canonical form of the board, which is the same for every
+    equivalent board.
+    """
+    return canonicalize(board.to_string())[0]
+
+
+class SolutionCache:
+    """Least recently used cache of solutions, keyed by canonical form, so that a
+    puzzle equivalent to one already solved is answered by transforming the cached
+    solution instead of searching again. Unsolvable puzzles are cached too.
+    hits, misses and evictions count what the cache has done, to help size it.
+
+    A puzzle seen before in exactly the same form is answered from a plain dict of
+    puzzle strings without canonicalizing it. Any other lookup canonicalizes the
+    puzzle, which takes about 4-10 ms for a typical 9x9 puzzle, more than dancing
+    links needs to solve most puzzles outright. So there is no default engine: the
+    cache only pays off with an engine that is clearly slower than that, like mrv
+    or brute_force, or with a stream that repeats puzzles.
+    """
+
+    def __init__(self, engine, maxsize: int = 4096) -> None:
+        assert maxsize > 0, "Invalid cache size"
+        self._maxsize = maxsize
+        self._engine = engine
+        self._solutions = OrderedDict()
+        # solutions by exact puzzle string, dropped oldest first once full
+        self._exact = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._solutions)
+
+    def info(self) -> dict[str, int]:
+        """Returns the counters and the current and maximum size of the cache."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._solutions),
+            "maxsize": self._maxsize,
+        }
+
+    def solve(self, board) -> bool:
+        """Fills in the empty cells of the board from the cache, or by solving it with
+        the engine on a miss. Returns True if the board has a solution.
+        Boards larger than 9x9 have no canonical form here and are always solved.
+        """
+        if board.geometry.size != 9:
+            return self._engine(board).solve()
+        puzzle = board.to_string()
+        if puzzle in self._exact:
+            self.hits += 1
+            return self._fill(board, self._exact[puzzle])
+
+        key, transform = canonicalize(puzzle)
+        if key in self._solutions:
+            self.hits += 1
+            self._solutions.move_to_end(key)
+            canonical_solution = self._solutions[key]
+            solution = None if canonical_solution is None else transform.invert(canonical_solution)
+            self._remember(puzzle, solution)
+            return self._fill(board, solution)
+
+        self.misses += 1
+        solved = self._engine(board).solve()
+        solution = board.to_string() if solved else None
+        self._solutions[key] = transform.apply(solution) if solved else None
+        if len(self._solutions) > self._maxsize:
+            self._solutions.popitem(last=False)
+            self.evictions += 1
+        self._remember(puzzle, solution)
+        return solved
+
+    def _remember(self, puzzle: str, solution: str | None) -> None:
+        """Keeps the solution of the exact puzzle string, dropping the oldest if full."""
+        self._exact[puzzle] = solution
+        if len(self._exact) > self._maxsize:
+            del self._exact[next(iter(self._exact))]
+
+    @staticmethod
+    def _fill(board, solution: str | None) -> bool:
+        """Fills the empty cells of the board from a solution string, if there is one."""
+        if solution is None:
+            return False
+        for cell in range(81):
+            if board.cell_is_empty(cell):
+                board.fill_cell(cell, int(solution[80 - cell]))
+        return True
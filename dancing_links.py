@@ -0,0 +1,235 @@
+"""Class for solving a sudoku puzzle as an exact cover problem with dancing links."""
+
+from typing import Iterator
+
+from limits import SolveLimits
+from solution import Solution
+
+
+class DancingLinksSolution(Solution):
+    """This class implements Knuth's Algorithm X with dancing links.
+    Sudoku is written as an exact cover problem with 324 constraints:
+    every cell has a number (0-80), and every row, column and square has each
+    number once (81-323, i.e. 81 + unit * 9 + number - 1).
+    Each of the 729 possible placements satisfies exactly four constraints.
+
+    The links are kept in flat lists instead of node objects. Node 0 is the root,
+    nodes 1-324 are the column headers, and the rest are placements. Constraints
+    already satisfied by the hints are left out of the header list, and only
+    placements that are still candidates are added, so the structure starts out
+    reduced to the empty part of the board.
+
+    Larger boards are written the same way, with 4 * size * size constraints.
+    """
+
+    def __init__(self, board):
+        super().__init__(board)
+        self._geometry = board.geometry
+        self._left = []
+        self._right = []
+        self._up = []
+        self._down = []
+        self._column = []
+        self._size = []
+        self._placements = []
+        self._partial = []
+
+    def _constraints(self, cell: int, number: int) -> tuple[int, int, int, int]:
+        """Returns the column header nodes of the four constraints a placement satisfies."""
+        geometry = self._geometry
+        row, column, square = geometry.cell_units[cell]
+        offset = geometry.cell_count + number
+        size = geometry.size
+        return (
+            cell + 1,
+            offset + row * size,
+            offset + column * size,
+            offset + square * size,
+        )
+
+    def _build(self) -> bool:
+        """Builds the links from the current board. Returns False if the hints break
+        a constraint, in which case there can be no solution.
+        """
+        headers = 4 * self._geometry.cell_count
+        self._left = list(range(-1, headers))
+        self._right = list(range(1, headers + 2))
+        self._up = list(range(headers + 1))
+        self._down = list(range(headers + 1))
+        self._column = list(range(headers + 1))
+        self._size = [0] * (headers + 1)
+        self._placements = [None] * (headers + 1)
+        self._partial = []
+
+        satisfied = set()
+        empty_cells = []
+        for cell in range(self._geometry.cell_count):
+            number = self._board.get_cell_value(cell)
+            if not number:
+                empty_cells.append(cell)
+                continue
+            for header in self._constraints(cell, number):
+                if header in satisfied:
+                    return False
+                satisfied.add(header)
+
+        # link the unsatisfied column headers in a circle through the root
+        previous = 0
+        for header in range(1, headers + 1):
+            if header not in satisfied:
+                self._right[previous] = header
+                self._left[header] = previous
+                previous = header
+        self._right[previous] = 0
+        self._left[0] = previous
+
+        for cell in empty_cells:
+            candidates = self._board.candidates(cell)
+            while candidates:
+                bit = candidates & -candidates
+                candidates ^= bit
+                self._add_placement(cell, bit.bit_length())
+        return True
+
+    def _add_placement(self, cell: int, number: int) -> None:
+        """Appends the four nodes of a placement, linked left to right in a circle
+        and each one added to the bottom of its column.
+        """
+        first = len(self._column)
+        for i, header in enumerate(self._constraints(cell, number)):
+            node = first + i
+            self._left.append(first + (i - 1) % 4)
+            self._right.append(first + (i + 1) % 4)
+            self._up.append(self._up[header])
+            self._down.append(header)
+            self._down[self._up[header]] = node
+            self._up[header] = node
+            self._column.append(header)
+            self._placements.append((cell, number))
+            self._size[header] += 1
+
+    def _cover(self, header: int) -> None:
+        """Removes a column from the header list, and every placement in it from the
+        other columns those placements are in.
+        """
+        left, right, up, down = self._left, self._right, self._up, self._down
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        row = down[header]
+        while row != header:
+            node = right[row]
+            while node != row:
+                down[up[node]] = down[node]
+                up[down[node]] = up[node]
+                self._size[self._column[node]] -= 1
+                node = right[node]
+            row = down[row]
+
+    def _uncover(self, header: int) -> None:
+        """Undoes _cover, relinking in exactly the reverse order."""
+        left, right, up, down = self._left, self._right, self._up, self._down
+        row = up[header]
+        while row != header:
+            node = left[row]
+            while node != row:
+                self._size[self._column[node]] += 1
+                down[up[node]] = node
+                up[down[node]] = node
+                node = left[node]
+            row = up[row]
+        right[left[header]] = header
+        left[right[header]] = header
+
+    def _search(self) -> Iterator[list[tuple[int, int]]]:
+        """Yields the placements of every solution, choosing the column with the
+        fewest placements left at each step.
+        """
+        right, size = self._right, self._size
+        header = right[0]
+        if not header:
+            if self.stats is not None:
+                self._record("solved", -1, 0, len(self._partial))
+            yield list(self._partial)
+            return
+
+        best = header
+        while header:
+            if size[header] < size[best]:
+                best = header
+                if not size[best]:
+                    return
+            header = right[header]
+
+        self._cover(best)
+        row = self._down[best]
+        while row != best:
+            self._partial.append(self._placements[row])
+            if self.stats is not None:
+                self._record("place", *self._placements[row], len(self._partial))
+            if self._limits is not None:
+                self._limits.tick()
+            node = right[row]
+            while node != row:
+                self._cover(self._column[node])
+                node = right[node]
+
+            yield from self._search()
+
+            node = self._left[row]
+            while node != row:
+                self._uncover(self._column[node])
+                node = self._left[node]
+            self._partial.pop()
+            if self.stats is not None:
+                self._record("backtrack", *self._placements[row], len(self._partial) + 1)
+            row = self._down[row]
+        self._uncover(best)
+
+    def solutions(self) -> Iterator[dict[int, int]]:
+        """Yields every solution of the current board as a dict of the empty cells
+        and the number each one gets. The board is not changed.
+        """
+        if not self._build():
+            return
+        for placements in self._search():
+            yield dict(placements)
+
+    def count(self, limit: int | None = None, limits: SolveLimits | None = None) -> int:
+        """Returns the number of solutions, stopping early once limit is reached.
+        If limits are given and one of them is hit, SolveInterrupted is raised.
+        """
+        self._set_limits(limits)
+        try:
+            if limits is not None:
+                limits.start()
+            count = 0
+            for _ in self.solutions():
+                count += 1
+                if count == limit:
+                    break
+            return count
+        finally:
+            self._set_limits(None)
+
+    def solve(self) -> bool:
+        """Fills in the empty cells of the board. Returns True if a solution was found,
+        otherwise the board is left as it was and False is returned.
+        """
+        for solution in self.solutions():
+            for cell, number in solution.items():
+                self._board.fill_cell(cell, number)
+            return True
+        return False
+
+
+def count_solutions(board, limit: int | None = 2, limits: SolveLimits | None = None) -> int:
+    """Returns how many solutions the board has, stopping as soon as limit is reached,
+    so with the default limit the answer is 0, 1 or 2 (meaning more than one).
+    Pass limit=None to count every solution. The board is not changed.
+    """
+    return DancingLinksSolution(board).count(limit, limits)
+
+
+def has_unique_solution(board) -> bool:
+    """Returns True if the board has exactly one solution."""
+    return count_solutions(board, limit=2) == 1
@@ -0,0 +1,115 @@
+"""Classes for enumerating every solution of a sudoku puzzle lazily.
+
+The search is a depth first search over a private copy of the board, branching on
+the empty cell with the fewest candidates like MinimumRemainingValuesSolution, but
+its stack is kept as plain data instead of in Python frames. That makes the
+enumeration an ordinary iterator whose state is the puzzle, and one (cell, number,
+untried candidates) entry per search level, so it can be pickled part way through
+and carried on later or by another process. Memory use doesn't grow with the
+number of solutions yielded.
+
+    solutions = iter_solutions(Board.from_string(puzzle))
+    first = next(solutions)
+    saved = pickle.dumps(solutions)
+    ...
+    for solution in pickle.loads(saved):
+        ...
+"""
+
+from typing import Iterator
+
+from bitboard import Board
+
+
+class SolutionIterator:
+    """Iterator over the solutions of a board, as puzzle strings (see
+    Board.to_string), in the order the search finds them. The board passed in is
+    not changed. count is the number of solutions yielded so far.
+    """
+
+    __slots__ = ("_snapshot", "_stack", "_started", "_done", "_board", "count")
+
+    def __init__(self, board: Board) -> None:
+        self._snapshot = board.snapshot()
+        # one (cell, number, untried candidates) entry for each cell the search has
+        # filled, outermost first; the board has one checkpoint open per entry
+        self._stack = []
+        self._started = False
+        self._done = board.has_conflicts()
+        self._board = None
+        self.count = 0
+
+    def __iter__(self) -> "SolutionIterator":
+        return self
+
+    def __next__(self) -> str:
+        if self._done:
+            raise StopIteration
+        board = self._board if self._board is not None else self._restore()
+        # the board still holds the last solution, so move past it first
+        if self._started and not self._backtrack():
+            return self._finish()
+        self._started = True
+        while True:
+            cell = board.most_constrained_cell()
+            if cell is None:
+                self.count += 1
+                return board.to_string()
+            candidates = board.candidates(cell)
+            if candidates:
+                self._place(cell, candidates)
+            elif not self._backtrack():
+                return self._finish()
+
+    def _finish(self) -> str:
+        """Marks the enumeration as finished, drops the board and stops iteration."""
+        self._done = True
+        self._board = None
+        self._stack = []
+        raise StopIteration
+
+    def _restore(self) -> Board:
+        """Rebuilds the board from the puzzle and the stack, after unpickling."""
+        board = self._board = Board.from_snapshot(self._snapshot)
+        for cell, number, _ in self._stack:
+            board.checkpoint()
+            board.fill_cell(cell, number)
+        return board
+
+    def _place(self, cell: int, candidates: int) -> None:
+        """Fills the cell with its lowest candidate inside a new checkpoint, and
+        pushes the candidates left to try.
+        """
+        bit = candidates & -candidates
+        number = bit.bit_length()
+        self._stack.append((cell, number, candidates ^ bit))
+        self._board.checkpoint()
+        self._board.fill_cell(cell, number)
+
+    def _backtrack(self) -> bool:
+        """Takes back placements until one has a candidate left to try, and tries it.
+        Returns False if every branch has been searched.
+        """
+        stack = self._stack
+        while stack:
+            cell, _, untried = stack.pop()
+            self._board.rollback(len(stack))
+            if untried:
+                self._place(cell, untried)
+                return True
+        return False
+
+    def __getstate__(self) -> tuple:
+        return self._snapshot, list(self._stack), self._started, self._done, self.count
+
+    def __setstate__(self, state: tuple) -> None:
+        self._snapshot, self._stack, self._started, self._done, self.count = state
+        self._board = None
+
+
+def iter_solutions(board: Board) -> Iterator[str]:
+    """Returns an iterator over every solution of the board, as puzzle strings,
+    found one at a time as it is consumed. It can be stopped at any point, and
+    pickled to carry on where it left off (see SolutionIterator).
+    """
+    return SolutionIterator(board)
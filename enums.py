@@ -1,9 +1,24 @@
 # pylint: disable=invalid-name
-"""Module that contains enums used to represent and solve the sudoku puzzle."""
+"""Module that contains enums used to represent and solve the sudoku puzzle.
+
+The enums describe the standard 9x9 board in readable terms. Their properties are
+lookups into the flat tables precomputed in geometry, which code on hot paths
+should index directly instead.
+"""
 
 from enum import Enum
 from typing import Iterable
 
+from geometry import (
+    CELL_COLUMNS,
+    CELL_ROWS,
+    CELL_SQUARES,
+    COLUMN_MASKS,
+    PEER_MASKS,
+    ROW_MASKS,
+    SQUARE_MASKS,
+)
+
 
 class Squares(Enum):
     """The square positions are 0-8, from bottom right to top left.
@@ -28,10 +43,6 @@ class Squares(Enum):
     seven = 7
     eight = 8
 
-    def __init__(self, position) -> None:
-        self._indices = self._calculate_square_indices()
-        self._position = position
-
     @staticmethod
     def _calculate_square_indices() -> dict[list[Iterable]]:
         """Method that pre computes the cell indices in a square and stores them in a dict.
@@ -57,7 +68,7 @@ class Squares(Enum):
         """Returns a list of tuples which represent the start and end ranges
         of the indices in the square.
         """
-        return self._indices[self.value]
+        return _SQUARE_INDICES[self.value]
 
     @property
     def rows(self) -> Iterable[int]:
@@ -69,6 +80,11 @@ class Squares(Enum):
         """Returns a range which is the indices of the columns that are in the square."""
         return range(self.value % 3 * 3, self.value % 3 * 3 + 3)
 
+    @property
+    def mask(self) -> int:
+        """Returns the 81 bit mask with the bits of the cells in the square turned on."""
+        return SQUARE_MASKS[self.value]
+
 
 class Cells(Enum):
     """The cells are indexed 0-80, from bottom right to top left.
@@ -172,17 +188,24 @@ class Cells(Enum):
     @property
     def row(self) -> int:
         """Returns the index of the row that the cell belongs to."""
-        return self.value // 9
+        return CELL_ROWS[self.value]
 
     @property
     def column(self) -> int:
         """Returns the index of the column that the cell belongs to."""
-        return self.value % 9
+        return CELL_COLUMNS[self.value]
 
     @property
     def square(self) -> int:
         """Returns the index of the square that the cell belongs to."""
-        return (self.row // 3 * 3) + (self.column // 3)
+        return CELL_SQUARES[self.value]
+
+    @property
+    def peers(self) -> int:
+        """Returns the 81 bit mask of the 20 cells that share a row, column or square
+        with the cell. The cell itself is not included.
+        """
+        return PEER_MASKS[self.value]
 
 
 class Rows(Enum):
@@ -224,6 +247,11 @@ class Rows(Enum):
         """Returns a range of the cell indices for the row."""
         return range(self.value * 9, self.value * 9 + 9)
 
+    @property
+    def mask(self) -> int:
+        """Returns the 81 bit mask with the bits of the cells in the row turned on."""
+        return ROW_MASKS[self.value]
+
 
 class Columns(Enum):
     """The columns are indexed 0-8 from right to left.
@@ -265,6 +293,11 @@ class Columns(Enum):
         """Returns a range of the cell indices for the column."""
         return range(self.value, self.value + 73, 9)
 
+    @property
+    def mask(self) -> int:
+        """Returns the 81 bit mask with the bits of the cells in the column turned on."""
+        return COLUMN_MASKS[self.value]
+
 
 class Numbers(Enum):
     """Enum for representing the numbers in the game, 1-9."""
@@ -278,3 +311,8 @@ class Numbers(Enum):
     seven = 7
     eight = 8
     nine = 9
+
+
+# the square indices are the same for every member, so they are computed once here
+# rather than once per member
+_SQUARE_INDICES = Squares._calculate_square_indices()  # pylint: disable=protected-access
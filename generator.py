@@ -0,0 +1,133 @@
+"""Functions for generating uniquely solvable sudoku puzzles."""
+
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
+
+from bitboard import Board
+from dancing_links import count_solutions
+from limits import SolveLimits
+from solution import MinimumRemainingValuesSolution
+
+
+class RandomizedSolution(MinimumRemainingValuesSolution):
+    """Minimum remaining values search which tries the candidates of each cell in a
+    random order. Solving a blank board with it gives a random full grid.
+    """
+
+    def __init__(self, board, rng: random.Random):
+        super().__init__(board)
+        self._rng = rng
+
+    def _candidate_order(self, cell: int) -> list[int]:
+        """Returns the candidates of the cell in a random order."""
+        numbers = super()._candidate_order(cell)
+        self._rng.shuffle(numbers)
+        return numbers
+
+
+def random_grid(rng: random.Random, box_size: int = 3) -> Board:
+    """Returns a board with every cell filled in at random, without breaking any rules.
+    On larger boards the search now and then wanders into a part of the tree with no
+    solution and takes a very long time to back out of it, so each try is given a
+    node budget of twice the number of cells, and the search starts over with new
+    random choices when it runs out. 9x9 grids never come close to the budget.
+    """
+    board = Board(box_size)
+    while True:
+        limits = SolveLimits(max_nodes=2 * board.geometry.cell_count)
+        if RandomizedSolution(board, rng).solve_instrumented(limits=limits).solved:
+            return board
+
+
+def generate_puzzle(
+    clues: int, rng: random.Random, attempts: int = 100, box_size: int = 3
+) -> str | None:
+    """Returns a uniquely solvable puzzle string with the given number of clues.
+    Starting from a random full grid, cells are cleared in a random order, and each
+    one is put back if clearing it gives the puzzle more than one solution. If a
+    grid runs out of cells to clear before reaching the target, another grid is
+    tried, up to attempts times, after which None is returned. Targets below about
+    22 clues are rarely reachable this way.
+    """
+    for _ in range(attempts):
+        board = random_grid(rng, box_size)
+        filled = board.geometry.cell_count
+        cells = list(range(filled))
+        rng.shuffle(cells)
+        for cell in cells:
+            if filled == clues:
+                break
+            number = board.get_cell_value(cell)
+            board.fill_cell(cell, 0)
+            if count_solutions(board, limit=2) == 1:
+                filled -= 1
+            else:
+                board.fill_cell(cell, number)
+        if filled == clues:
+            return board.to_string()
+    return None
+
+
+def _generate_indexed(index: int, clues: int, seed: int, box_size: int = 3) -> str | None:
+    """Generates the puzzle at the index of a seeded sequence. Each puzzle gets its
+    own random generator, so the sequence is the same however it is split up.
+    """
+    return generate_puzzle(clues, random.Random(f"{seed}:{index}"), box_size=box_size)
+
+
+def generate_many(
+    count: int,
+    clues: int,
+    seed: int = 0,
+    workers: int | None = None,
+    chunksize: int = 4,
+    box_size: int = 3,
+) -> Iterator[str | None]:
+    """Yields count puzzles with the given number of clues, generated across a pool of
+    worker processes. The same seed always gives the same puzzles in the same order,
+    whatever the number of workers. With workers=1 no pool is started.
+    """
+    if workers == 1:
+        for index in range(count):
+            yield _generate_indexed(index, clues, seed, box_size)
+        return
+
+    with ProcessPoolExecutor(workers) as executor:
+        yield from executor.map(
+            _generate_indexed,
+            range(count),
+            [clues] * count,
+            [seed] * count,
+            [box_size] * count,
+            chunksize=chunksize,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("count", type=int, help="number of puzzles to generate")
+    parser.add_argument("--clues", type=int, default=28, help="clues per puzzle")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--box-size", type=int, default=3, help="3 for 9x9, 4 for 16x16, 5 for 25x25"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    generated = 0
+    for puzzle in generate_many(
+        args.count, args.clues, args.seed, args.workers, box_size=args.box_size
+    ):
+        if puzzle is not None:
+            print(puzzle)
+            generated += 1
+    elapsed = time.perf_counter() - start
+    print(
+        f"{generated} puzzles in {elapsed:.2f}s ({generated / elapsed:.1f} puzzles/sec)",
+        file=sys.stderr,
+    )
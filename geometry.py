@@ -0,0 +1,170 @@
+"""Precomputed lookup tables describing the layout of a sudoku board of any box size.
+
+A board with box size n has n * n rows, columns and squares, and n ** 4 cells.
+Cells are indexed from the bottom right to the top left, the same way as Cells
+describes for the standard 9x9 board, so bit i of a bitboard is cell i.
+"""
+
+# symbols for the numbers 1-25, so that puzzles up to 25x25 can be written one
+# character per cell; '.' or '0' is a blank cell
+SYMBOLS = "123456789ABCDEFGHIJKLMNOP"
+
+
+class Geometry:
+    """Lookup tables for one box size. Units are numbered with the rows first, then
+    the columns, then the squares, so for 9x9 rows are 0-8, columns are 9-17 and
+    squares are 18-26.
+    """
+
+    __slots__ = (
+        "box_size",
+        "size",
+        "cell_count",
+        "full_mask",
+        "all_candidates",
+        "cell_rows",
+        "cell_columns",
+        "cell_squares",
+        "row_masks",
+        "column_masks",
+        "square_masks",
+        "peer_masks",
+        "cell_units",
+        "peer_indices",
+        "unit_indices",
+        "symbols",
+        "digit_tables",
+        "row_low_bits",
+        "row_top_bits",
+        "band_rows",
+        "square_corners",
+        "row_starts",
+        "square_block",
+    )
+
+    def __init__(self, box_size: int) -> None:
+        assert 2 <= box_size <= 5, "Invalid box size"
+        size = box_size * box_size
+        self.box_size = box_size
+        self.size = size
+        self.cell_count = size * size
+        self.full_mask = (1 << self.cell_count) - 1
+        # candidate masks have bit n - 1 on if n is a candidate
+        self.all_candidates = (1 << size) - 1
+        self.symbols = SYMBOLS[:size]
+
+        cells = range(self.cell_count)
+        self.cell_rows = tuple(cell // size for cell in cells)
+        self.cell_columns = tuple(cell % size for cell in cells)
+        self.cell_squares = tuple(
+            row // box_size * box_size + column // box_size
+            for row, column in zip(self.cell_rows, self.cell_columns)
+        )
+        self.cell_units = tuple(
+            zip(
+                self.cell_rows,
+                (size + column for column in self.cell_columns),
+                (2 * size + square for square in self.cell_squares),
+            )
+        )
+
+        # the cells of each unit are built up directly rather than by testing every
+        # cell against every unit mask, which keeps building the tables quick
+        unit_cells = [[] for _ in range(3 * size)]
+        for cell, units in enumerate(self.cell_units):
+            for unit in units:
+                unit_cells[unit].append(cell)
+        self.unit_indices = tuple(tuple(unit) for unit in unit_cells)
+        unit_masks = [sum(1 << cell for cell in unit) for unit in unit_cells]
+        self.row_masks = tuple(unit_masks[:size])
+        self.column_masks = tuple(unit_masks[size : 2 * size])
+        self.square_masks = tuple(unit_masks[2 * size :])
+
+        peer_indices = []
+        for cell, units in enumerate(self.cell_units):
+            peers = set()
+            for unit in units:
+                peers.update(unit_cells[unit])
+            peers.discard(cell)
+            peer_indices.append(tuple(sorted(peers)))
+        self.peer_indices = tuple(peer_indices)
+        self.peer_masks = tuple(sum(1 << peer for peer in peers) for peers in peer_indices)
+
+        # bytes.translate tables that map one number's symbol to "1" and every other
+        # symbol to "0", for each number 0-size, so that a puzzle string reads as the
+        # binary value of each bitboard. '.' is a blank like '0', and any byte that
+        # isn't a symbol is mapped to "x" so that int rejects it, rather than skipping
+        # it like it would an underscore
+        symbols = (b"0.", *(symbol.encode() for symbol in self.symbols))
+        tables = []
+        for number in range(size + 1):
+            table = bytearray(b"x" * 256)
+            for other, characters in enumerate(symbols):
+                for character in characters:
+                    table[character] = ord("1") if other == number else ord("0")
+            tables.append(bytes(table))
+        self.digit_tables = tuple(tables)
+
+        # masks for testing every row, column and square of a bitboard at once: the
+        # low size - 1 bits of every row, the top bit of every row, the first row of
+        # every band, and the first cell of every square; and multipliers that spread
+        # a bit over a unit: one bit at the start of every row, and the cells of the
+        # bottom right square
+        rows = range(size)
+        corners = range(0, size, box_size)
+        self.row_low_bits = sum(((1 << (size - 1)) - 1) << (size * row) for row in rows)
+        self.row_top_bits = sum(1 << (size - 1) << (size * row) for row in rows)
+        self.band_rows = sum(self.all_candidates << (size * row) for row in corners)
+        self.square_corners = sum(
+            1 << (size * row + column) for row in corners for column in corners
+        )
+        self.row_starts = sum(1 << (size * row) for row in rows)
+        self.square_block = sum(
+            1 << (size * row + column)
+            for row in range(box_size)
+            for column in range(box_size)
+        )
+
+    @property
+    def unit_count(self) -> int:
+        """Returns the number of rows, columns and squares together."""
+        return 3 * self.size
+
+    def __repr__(self) -> str:
+        return f"<Geometry {self.size}x{self.size}>"
+
+
+_GEOMETRIES = {}
+
+
+def geometry_for_box_size(box_size: int = 3) -> Geometry:
+    """Returns the shared tables for the box size, building them on first use."""
+    if box_size not in _GEOMETRIES:
+        _GEOMETRIES[box_size] = Geometry(box_size)
+    return _GEOMETRIES[box_size]
+
+
+def geometry_for_length(length: int) -> Geometry:
+    """Returns the geometry of a puzzle string with one character per cell."""
+    for box_size in range(2, 6):
+        if box_size**4 == length:
+            return geometry_for_box_size(box_size)
+    raise ValueError(f"Invalid puzzle length {length}")
+
+
+STANDARD = geometry_for_box_size(3)
+
+# The tables of the standard 9x9 board as plain module constants, for code that
+# only handles 9x9 boards. Indexing one of these tuples is the fastest lookup
+# there is; the enums module is a readable facade over the same tables.
+CELL_ROWS = STANDARD.cell_rows
+CELL_COLUMNS = STANDARD.cell_columns
+CELL_SQUARES = STANDARD.cell_squares
+CELL_UNITS = STANDARD.cell_units
+ROW_MASKS = STANDARD.row_masks
+COLUMN_MASKS = STANDARD.column_masks
+SQUARE_MASKS = STANDARD.square_masks
+PEER_MASKS = STANDARD.peer_masks
+PEER_INDICES = STANDARD.peer_indices
+UNIT_INDICES = STANDARD.unit_indices
+ALL_CANDIDATES = STANDARD.all_candidates
@@ -0,0 +1,215 @@
+"""Classes for giving hints and checking moves while someone plays a sudoku puzzle."""
+
+from bitboard import Board
+from dancing_links import DancingLinksSolution
+from propagation import Propagator
+from solution import Solution
+
+# reasons a hint can be given for, in the order they are looked for
+REASONS = ("mistake", "naked_single", "hidden_single", "propagation", "solution")
+
+
+class Hint:
+    """A number that can go in a cell next, and why. The reason is one of REASONS:
+    "mistake" means the cell holds the wrong number and should hold this one,
+    "naked_single" that it is the only candidate of the cell, "hidden_single" that
+    the cell is the only place in one of its units for it, "propagation" that the
+    harder techniques of a Propagator lead to it, and "solution" that it is taken
+    from the solution because no technique here finds anything.
+    """
+
+    __slots__ = ("cell", "number", "reason")
+
+    def __init__(self, cell: int, number: int, reason: str) -> None:
+        self.cell = cell
+        self.number = number
+        self.reason = reason
+
+    def __repr__(self) -> str:
+        return f"<Hint cell {self.cell}: {self.number} ({self.reason})>"
+
+
+class HintSession:
+    """Keeps the state needed to answer hints quickly while a puzzle is played.
+
+    The solution is found once. The naked singles are seeded from
+    find_single_candidate_solutions and, after each move, only the moved cell and
+    its peers are looked at again, since no other candidates can have changed.
+    Hidden singles and the deductions of a Propagator are worked out when first
+    needed and kept until the next move. Every move is made inside a checkpoint of
+    the board, and the caches are saved with it, so undo rolls the board back and
+    puts the caches back as they were.
+
+    The cells already filled when the session starts are taken as the givens of
+    the puzzle, and can't be changed by a move.
+
+    The caches remember the snapshot of the board they were made for. If the board
+    is changed some other way, for example by calling fill_cell directly, they are
+    rebuilt the next time they are used.
+    """
+
+    def __init__(self, board: Board) -> None:
+        self._board = board
+        geometry = board.geometry
+        self._givens = frozenset(
+            cell for cell in range(geometry.cell_count) if not board.cell_is_empty(cell)
+        )
+        self._solution = None
+        self._solved = False
+        self._moves = []
+        self._rebuild()
+
+    @property
+    def board(self) -> Board:
+        """Returns the board being played."""
+        return self._board
+
+    @property
+    def solution(self) -> list[int] | None:
+        """Returns the numbers of the solved board, indexed by cell, or None if the
+        puzzle has no solution. The puzzle is solved the first time this is used.
+        """
+        if not self._solved:
+            board = Board(self._board.geometry.box_size)
+            for cell in self._givens:
+                board.fill_cell(cell, self._board.get_cell_value(cell))
+            if DancingLinksSolution(board).solve():
+                self._solution = board.to_list()
+            self._solved = True
+        return self._solution
+
+    def _rebuild(self) -> None:
+        """Recomputes the caches from scratch for the current board."""
+        self._snapshot = self._board.snapshot()
+        self._singles = Solution(self._board).find_single_candidate_solutions()
+        self._hidden = None
+        self._propagated = None
+
+    def _check(self) -> None:
+        """Rebuilds the caches if the board has changed since they were made."""
+        if self._board.snapshot() != self._snapshot:
+            self._rebuild()
+
+    def apply_move(self, cell: int, number: int) -> bool:
+        """Fills the cell with the number, or clears it if the number is 0, as a move
+        that undo can take back. Returns True if the move agrees with the solution,
+        or when the puzzle has no solution, if it breaks no rule.
+        Raises ValueError for a cell that was given in the puzzle.
+        """
+        if cell in self._givens:
+            raise ValueError(f"Cell {cell} is given in the puzzle")
+        self._check()
+        board = self._board
+        previous = board.get_cell_value(cell)
+        correct = not number or (
+            board.cell_can_contain(cell, number)
+            if self.solution is None
+            else self.solution[cell] == number
+        )
+        if previous == number:
+            return correct
+
+        saved = (self._snapshot, self._singles, self._propagated)
+        self._moves.append((board.checkpoint(), saved))
+        board.fill_cell(cell, number)
+
+        # only the cell and its peers can have had their candidates changed
+        singles = dict(self._singles)
+        for changed in (cell, *board.geometry.peer_indices[cell]):
+            mask = board.candidates(changed)
+            if mask and not mask & (mask - 1):
+                singles[changed] = mask.bit_length()
+            else:
+                singles.pop(changed, None)
+        self._singles = singles
+        self._hidden = None
+
+        # the deductions still hold after a correct placement, except for the cell itself
+        if self._propagated is not None and number and correct and not previous:
+            self._propagated = {
+                other: value for other, value in self._propagated.items() if other != cell
+            }
+        else:
+            self._propagated = None
+        self._snapshot = board.snapshot()
+        return correct
+
+    def undo(self) -> bool:
+        """Takes back the last move, putting the board and the caches back the way
+        they were before it. Returns False if there is no move to take back.
+        """
+        if not self._moves:
+            return False
+        mark, (snapshot, singles, propagated) = self._moves.pop()
+        self._board.rollback(mark)
+        if self._board.snapshot() == snapshot:
+            self._snapshot, self._singles, self._propagated = snapshot, singles, propagated
+            self._hidden = None
+        else:
+            self._rebuild()
+        return True
+
+    def next_hint(self) -> Hint | None:
+        """Returns a hint for the next move, or None if the board is solved or the
+        puzzle has no solution. Mistakes are pointed out first, then the simplest
+        deduction available is given.
+        """
+        self._check()
+        board = self._board
+        solution = self.solution
+        if solution is None:
+            return None
+        for cell, number in enumerate(board.to_list()):
+            if number and number != solution[cell]:
+                return Hint(cell, solution[cell], "mistake")
+
+        for cell, number in self._singles.items():
+            return Hint(cell, number, "naked_single")
+
+        if self._hidden is None:
+            self._hidden = self._hidden_singles()
+        for cell, number in self._hidden.items():
+            return Hint(cell, number, "hidden_single")
+
+        if self._propagated is None:
+            self._propagated = self._propagate()
+        for cell, number in self._propagated.items():
+            return Hint(cell, number, "propagation")
+
+        best_cell = board.most_constrained_cell()
+        if best_cell is None:
+            return None
+        return Hint(best_cell, solution[best_cell], "solution")
+
+    def _hidden_singles(self) -> dict[int, int]:
+        """Returns the cells that are the only place in one of their units for a number."""
+        board = self._board
+        geometry = board.geometry
+        hidden = {}
+        for unit, cells in enumerate(geometry.unit_indices):
+            for number in range(1, geometry.size + 1):
+                if board.unit_count(unit, number):
+                    continue
+                bit = 1 << (number - 1)
+                positions = [cell for cell in cells if board.candidates(cell) & bit]
+                if len(positions) == 1:
+                    hidden.setdefault(positions[0], number)
+        return hidden
+
+    def _propagate(self) -> dict[int, int]:
+        """Returns the cells a Propagator fills in on a copy of the board."""
+        copy = self._board.copy()
+        if not Propagator(copy).propagate():
+            return {}
+        return {
+            cell: copy.get_cell_value(cell)
+            for cell in range(self._board.geometry.cell_count)
+            if self._board.cell_is_empty(cell) and not copy.cell_is_empty(cell)
+        }
+
+
+def next_hint(board: Board) -> Hint | None:
+    """Returns a hint for the next move on the board. This solves the puzzle every
+    time it is called; use a HintSession to keep that work between moves.
+    """
+    return HintSession(board).next_hint()
@@ -0,0 +1,76 @@
+"""Classes for bounding how long a solve may run."""
+
+import threading
+import time
+
+
+class SolveInterrupted(Exception):
+    """Raised inside a solver when one of its limits is hit. reason is "timeout",
+    "node_limit" or "cancelled".
+    """
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CancellationToken:
+    """Flag that another thread can set to stop a solve. Any object with an is_set
+    method, like a multiprocessing.Event, can be passed in to share the flag with
+    other processes.
+    """
+
+    def __init__(self, event=None) -> None:
+        self._event = event if event is not None else threading.Event()
+
+    def cancel(self) -> None:
+        """Asks every solve using this token to stop."""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Returns True once cancel has been called."""
+        return self._event.is_set()
+
+
+class SolveLimits:
+    """Wall clock timeout, search node budget and cancellation token for a solve.
+    Any of them can be left as None. Solvers call tick once per search node; the
+    clock and the token are only looked at every CHECK_EVERY nodes to keep that
+    cheap, so a solve can overrun its deadline by that many nodes.
+    """
+
+    CHECK_EVERY = 64
+
+    def __init__(
+        self,
+        timeout: float | None = None,
+        max_nodes: int | None = None,
+        token: CancellationToken | None = None,
+    ) -> None:
+        self.timeout = timeout
+        self.max_nodes = max_nodes
+        self.token = token
+        self.nodes = 0
+        self._deadline = None
+
+    def start(self) -> None:
+        """Starts the clock and the node count. Called when a solve begins."""
+        self.nodes = 0
+        self._deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        self.check()
+
+    def check(self) -> None:
+        """Raises SolveInterrupted if the deadline has passed or the token is cancelled."""
+        if self.token is not None and self.token.cancelled:
+            raise SolveInterrupted("cancelled")
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            raise SolveInterrupted("timeout")
+
+    def tick(self) -> None:
+        """Counts a search node, raising SolveInterrupted if a limit has been hit."""
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SolveInterrupted("node_limit")
+        if not self.nodes % self.CHECK_EVERY:
+            self.check()
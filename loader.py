@@ -0,0 +1,51 @@
+"""Functions for streaming sudoku puzzles from text or packed files."""
+
+import re
+from typing import Iterable, Iterator
+
+from bitboard import Board
+from packed import PackedCorpus, is_packed
+
+# the puzzle is everything up to the first comma or whitespace on a line
+_PUZZLE = re.compile(r"[^\s,]*")
+
+
+def load_puzzles(path: str) -> Iterator[str]:
+    """Yields the puzzle strings from a text file, one per line.
+    The file is read a line at a time, so memory use doesn't grow with its size.
+    Blank lines and lines starting with '#' are skipped. Anything after the puzzle
+    on a line, following a comma or whitespace (for example the solution), is ignored.
+    Packed files (see packed) are recognised by their header and read from a
+    memory map instead.
+    """
+    if is_packed(path):
+        with PackedCorpus(path) as corpus:
+            yield from corpus
+        return
+    # bytes that aren't ASCII are replaced rather than raised on, so that the line
+    # they are on is rejected as a puzzle on its own and the rest can still be read
+    with open(path, encoding="ascii", errors="replace") as file:
+        yield from read_puzzles(file)
+
+
+def read_puzzles(lines: Iterable[str]) -> Iterator[str]:
+    """Yields the puzzle strings from an open text file (like sys.stdin) or any other
+    iterable of lines, skipping lines the same way as load_puzzles.
+    """
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield _PUZZLE.match(line).group()
+
+
+def load_boards(path: str) -> Iterator[Board]:
+    """Yields a board for every puzzle in a text or packed file, see load_puzzles.
+    The boards of a packed file are built from its bitboards directly.
+    """
+    if is_packed(path):
+        with PackedCorpus(path) as corpus:
+            for index in range(len(corpus)):
+                yield corpus.board(index)
+        return
+    for puzzle in load_puzzles(path):
+        yield Board.from_string(puzzle)
@@ -0,0 +1,90 @@
+"""Load generator for server.py: sends puzzles at several concurrency levels and
+reports requests/sec and latency percentiles for each.
+
+    python loadgen.py corpora/hard.txt --port 8765 --concurrency 1 4 16 --requests 200
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+
+from benchmark import percentile
+from loader import load_puzzles
+
+
+async def _connect(host: str, port: int, path: str | None):
+    """Opens a connection to the server."""
+    if path is not None:
+        return await asyncio.open_unix_connection(path)
+    return await asyncio.open_connection(host, port)
+
+
+async def _client(puzzles, count: int, latencies: list, statuses: dict, args) -> None:
+    """Sends requests one at a time over a single connection until count are done."""
+    reader, writer = await _connect(args.host, args.port, args.unix)
+    try:
+        for index in range(count):
+            request = {"id": index, "puzzle": next(puzzles)}
+            if args.engine:
+                request["engine"] = args.engine
+            if args.timeout is not None:
+                request["timeout"] = args.timeout
+            start = time.perf_counter()
+            writer.write(json.dumps(request).encode() + b"\n")
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - start)
+            statuses[response["status"]] = statuses.get(response["status"], 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_level(puzzles, concurrency: int, requests: int, args) -> dict:
+    """Runs requests spread over concurrency connections and returns the results."""
+    latencies = []
+    statuses = {}
+    per_client = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(_client(puzzles, count, latencies, statuses, args) for count in per_client if count)
+    )
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "requests_per_sec": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+        "statuses": statuses,
+    }
+
+
+async def main(args) -> None:
+    """Runs every concurrency level in turn and prints a line for each."""
+    puzzles = itertools.cycle(list(load_puzzles(args.corpus)))
+    print(f"{'concurrency':>11} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}  statuses")
+    for concurrency in args.concurrency:
+        row = await run_level(puzzles, concurrency, args.requests, args)
+        print(
+            f"{row['concurrency']:>11} {row['requests_per_sec']:>9} {row['p50_ms']:>9} "
+            f"{row['p99_ms']:>9} {row['max_ms']:>9}  {row['statuses']}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("corpus", help="puzzle file to send, one puzzle per line")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="connect to this Unix socket path instead of TCP")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=200, help="requests per level")
+    parser.add_argument("--engine", default=None)
+    parser.add_argument("--timeout", type=float, default=None)
+    asyncio.run(main(parser.parse_args()))
@@ -1,40 +1,143 @@
-"""Main."""
+"""Command line entry point for solving files of puzzles.
 
+Reads puzzles one per line, in the 81 character format ('.' or '0' for blanks,
+or 256 and 625 characters with the letters A-P for 16x16 and 25x25 puzzles),
+from the files given or from stdin, and writes one line per puzzle to stdout:
+the solution, or for a puzzle that wasn't solved, the puzzle followed by a comma
+and the reason ("unsolvable", "timeout", ...), which is "error" for a line
+that isn't a puzzle. Input and output are streamed, so files of any size can be
+processed in constant memory.
+
+    python main.py puzzles.txt > solutions.txt
+    python main.py --workers 8 --engine mrv --timeout 2 --stats < puzzles.txt
+    python main.py --count --limit 2 puzzles.txt
+    python main.py --validate --timing grids.txt
+"""
+
+import argparse
+import os
+import sys
+import time
+from functools import partial
+from itertools import chain
+
+from batch import ENGINES, map_chunked, validate
 from bitboard import Board
+from dancing_links import count_solutions
+from limits import SolveInterrupted, SolveLimits
+from loader import load_puzzles, read_puzzles
+
+
+def process(puzzle: str, engine: str, timeout: float | None) -> tuple[str, str, int]:
+    """Solves one puzzle and returns its output line, status and search node count.
+    A puzzle that can't be read gives the status "error".
+    """
+    try:
+        board = Board.from_string(puzzle)
+    except ValueError:
+        return f"{puzzle},error", "error", 0
+    result = ENGINES[engine](board).solve_instrumented(limits=SolveLimits(timeout=timeout))
+    if result.solved:
+        return result.solution, result.status, result.stats.nodes
+    return f"{puzzle},{result.status}", result.status, result.stats.nodes
+
+
+def count(puzzle: str, limit: int | None, timeout: float | None) -> tuple[str, str, int]:
+    """Counts the solutions of one puzzle and returns its output line, status and
+    node count. The output line is the puzzle, a comma, and the count, or the
+    reason the count wasn't finished ("error", "timeout", ...).
+    """
+    try:
+        board = Board.from_string(puzzle)
+    except ValueError:
+        return f"{puzzle},error", "error", 0
+    try:
+        solutions = count_solutions(board, limit, SolveLimits(timeout=timeout))
+    except SolveInterrupted as interrupted:
+        return f"{puzzle},{interrupted.reason}", interrupted.reason, 0
+    status = "unsolvable" if not solutions else "unique" if solutions == 1 else "multiple"
+    return f"{puzzle},{solutions}", status, 0
+
+
+def check(grid: str) -> tuple[str, str, int]:
+    """Checks that a grid is a correct solution and returns its output line, status and
+    node count. The output line is the grid, a comma, and "valid", or "invalid" and
+    the positions in the grid (0 is the first character) of the cells at fault.
+    """
+    try:
+        cells = validate(grid)
+    except ValueError:
+        return f"{grid},error", "error", 0
+    if not cells:
+        return f"{grid},valid", "valid", 0
+    positions = " ".join(str(len(grid) - 1 - cell) for cell in reversed(cells))
+    return f"{grid},invalid,{positions}", "invalid", 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Runs the command line interface. Returns the exit code."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("files", nargs="*", help="puzzle files, or - for stdin (the default)")
+    parser.add_argument("--engine", choices=ENGINES, default="dancing_links")
+    parser.add_argument("--workers", type=int, default=1, help="0 for one per CPU")
+    parser.add_argument("--chunksize", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=None, help="seconds per puzzle")
+    parser.add_argument(
+        "--count", action="store_true", help="write how many solutions each puzzle has"
+    )
+    parser.add_argument("--limit", type=int, default=2, help="stop counting at this many")
+    parser.add_argument(
+        "--validate", action="store_true", help="check that each line is a correct solution"
+    )
+    parser.add_argument(
+        "--stats", action="store_true", help="write totals by status to stderr at the end"
+    )
+    parser.add_argument(
+        "--timing", action="store_true", help="write elapsed time and puzzles/sec to stderr"
+    )
+    args = parser.parse_args(argv)
+
+    sources = args.files or ["-"]
+    puzzles = chain.from_iterable(
+        read_puzzles(sys.stdin) if source == "-" else load_puzzles(source) for source in sources
+    )
+    if args.validate:
+        function = check
+    elif args.count:
+        function = partial(count, limit=args.limit, timeout=args.timeout)
+    else:
+        function = partial(process, engine=args.engine, timeout=args.timeout)
+
+    start = time.perf_counter()
+    statuses = {}
+    nodes = 0
+    total = 0
+    write = sys.stdout.write
+    try:
+        for line, status, puzzle_nodes in map_chunked(
+            function, puzzles, args.workers or None, args.chunksize
+        ):
+            write(line + "\n")
+            statuses[status] = statuses.get(status, 0) + 1
+            nodes += puzzle_nodes
+            total += 1
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # the reader went away (e.g. piped into head), so stop quietly
+        sys.stdout = open(os.devnull, "w", encoding="ascii")
+        return 1
+    elapsed = time.perf_counter() - start
+
+    if args.stats:
+        summary = ", ".join(f"{status}: {number}" for status, number in sorted(statuses.items()))
+        print(f"{total} puzzles ({summary}), {nodes} search nodes", file=sys.stderr)
+    if args.timing:
+        rate = total / elapsed if elapsed else 0.0
+        print(f"{elapsed:.3f}s, {rate:.1f} puzzles/sec", file=sys.stderr)
+    return 0
+
 
 if __name__ == "__main__":
-    board = Board()
-    print("new board")
-    board.print_board()
-    board._solution.solve_board_with_hints()
-
-    board = Board()
-    print("new board")
-    board.print_board()
-    board._solution.solve_blank_board()
-
-    board = Board()
-    board.fill_cell(0, 5)
-    print("new board")
-    board.print_board()
-    board._solution.solve_board_with_hints()
-
-    board = Board()
-    board.fill_cell(0, 1)
-    board.fill_cell(5, 2)
-    board.fill_cell(67, 3)
-    board.fill_cell(34, 4)
-    board.fill_cell(2, 5)
-    print("new board")
-    board.print_board()
-    board._solution.solve_board_with_hints()
-
-    board = Board()
-    board.fill_cell(10, 1)
-    board.fill_cell(53, 2)
-    board.fill_cell(63, 3)
-    board.fill_cell(33, 4)
-    board.fill_cell(23, 5)
-    print("new board")
-    board.print_board()
-    board._solution.solve_board_with_hints()
+    sys.exit(main())
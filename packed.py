@@ -0,0 +1,279 @@
+"""Functions and classes for storing puzzle corpora in a packed binary format.
+
+A packed file is a header followed by fixed size records, so any puzzle can be
+read by its index straight from a memory map of the file:
+
+    header   12 bytes: b"SDKP", format version, box size, flags, a zero byte,
+             and the number of records as a little endian 32 bit integer
+    record   the cells in puzzle string order (top left first), 4 bits each for
+             a 9x9 puzzle, so 41 bytes, or a byte each for larger puzzles, where
+             0 is a blank; if the givens flag is set, followed by the givens mask,
+             one bit per cell as in a bitboard, so 11 more bytes for 9x9
+
+With a givens mask the cells of a record are the solution, and the puzzle is the
+cells the mask keeps, so one file holds both puzzles and solutions.
+
+    python packed.py corpora/hard.txt hard.sdkp --solve
+"""
+
+import argparse
+import binascii
+import mmap
+import struct
+import sys
+from itertools import tee
+from typing import Iterable, Iterator
+
+from bitboard import Board, bitboards_from_bytes, bitboards_from_string
+from dancing_links import DancingLinksSolution
+from geometry import SYMBOLS, Geometry, geometry_for_box_size, geometry_for_length
+
+MAGIC = b"SDKP"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBxI")
+
+# set in the flags of the header if every record ends with a givens mask
+GIVENS = 1
+
+# byte values to puzzle string symbols and back, for puzzles stored a byte per cell
+_BYTES_TO_SYMBOLS = bytes.maketrans(bytes(range(len(SYMBOLS) + 1)), b"0" + SYMBOLS.encode())
+_SYMBOLS_TO_BYTES = bytes.maketrans(
+    b"." + b"0" + SYMBOLS.encode(), bytes([0]) + bytes(range(len(SYMBOLS) + 1))
+)
+
+
+def _nibbles(geometry: Geometry) -> bool:
+    """Returns True if the cells of the geometry are stored 4 bits each."""
+    return geometry.size < 16
+
+
+def _cell_bytes(geometry: Geometry) -> int:
+    """Returns the number of bytes the cells of one record take up."""
+    if _nibbles(geometry):
+        return (geometry.cell_count + 1) // 2
+    return geometry.cell_count
+
+
+def _pack(puzzle: str, geometry: Geometry) -> bytes:
+    """Returns the cells of a puzzle string packed into bytes. Raises ValueError for
+    a symbol that isn't one of the geometry's, so that a corrupt file is never
+    written.
+    """
+    unknown = puzzle.encode("ascii").translate(None, b".0" + geometry.symbols.encode())
+    if unknown:
+        raise ValueError(f"Invalid symbol {chr(unknown[0])!r}")
+    if _nibbles(geometry):
+        digits = puzzle.replace(".", "0")
+        if len(digits) % 2:
+            digits += "0"
+        return bytes.fromhex(digits)
+    return puzzle.encode("ascii").translate(_SYMBOLS_TO_BYTES)
+
+
+def _unpack(data: bytes, geometry: Geometry) -> bytes:
+    """Returns the puzzle, as ASCII bytes with '0' for blanks, of the packed cells."""
+    if _nibbles(geometry):
+        return binascii.hexlify(data)[: geometry.cell_count]
+    return data.translate(_BYTES_TO_SYMBOLS)
+
+
+def write_packed(
+    path: str, puzzles: Iterable[str], solutions: Iterable[str] | None = None
+) -> int:
+    """Writes the puzzle strings to a packed file and returns how many were written.
+    If solutions are given, one for each puzzle, each record holds the solution and
+    a givens mask of the cells filled in the puzzle. The puzzles are read lazily,
+    and must all be the same size. Raises ValueError for an invalid puzzle, for a
+    solution that is the wrong size, has blank cells or disagrees with the givens
+    of its puzzle, and if the solutions run out before the puzzles.
+    """
+    puzzles = iter(puzzles)
+    solutions = None if solutions is None else iter(solutions)
+    count = 0
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+        geometry = None
+        for puzzle in puzzles:
+            if geometry is None:
+                geometry = geometry_for_length(len(puzzle))
+            if len(puzzle) != geometry.cell_count:
+                raise ValueError("Every puzzle in a packed file must be the same size")
+            if solutions is None:
+                file.write(_pack(puzzle, geometry))
+            else:
+                solution = next(solutions, None)
+                if solution is None:
+                    raise ValueError("There are fewer solutions than puzzles")
+                if len(solution) != geometry.cell_count:
+                    raise ValueError(f"Solution {solution} is the wrong size")
+                blank, *numbers = bitboards_from_string(puzzle)[1]
+                solved_blank, *solved_numbers = bitboards_from_string(solution)[1]
+                if solved_blank:
+                    raise ValueError(f"Solution {solution} has blank cells")
+                if any(given & ~solved for given, solved in zip(numbers, solved_numbers)):
+                    raise ValueError(f"Solution {solution} disagrees with puzzle {puzzle}")
+                givens = geometry.full_mask & ~blank
+                file.write(_pack(solution, geometry))
+                file.write(givens.to_bytes((geometry.cell_count + 7) // 8, "big"))
+            count += 1
+        flags = GIVENS if solutions is not None else 0
+        box_size = geometry.box_size if geometry is not None else 3
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, box_size, flags, count))
+    return count
+
+
+def is_packed(path: str) -> bool:
+    """Returns True if the file starts with the header of a packed file."""
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+class PackedCorpus:
+    """Reads a packed file through a memory map, so that opening it costs the same
+    whatever its size, and any puzzle can be read by index without reading the
+    ones before it. Index ranges can be handed to separate workers to split a
+    corpus up between them.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, box_size, flags, count = HEADER.unpack_from(self._mmap)
+        except struct.error:
+            magic = version = box_size = None
+        if magic != MAGIC or version != VERSION or box_size not in range(2, 6):
+            self._mmap.close()
+            raise ValueError(f"{path} is not a packed puzzle file")
+        self._geometry = geometry_for_box_size(box_size)
+        self._count = count
+        self._cell_bytes = _cell_bytes(self._geometry)
+        self._givens_bytes = (self._geometry.cell_count + 7) // 8 if flags & GIVENS else 0
+        self._record_size = self._cell_bytes + self._givens_bytes
+        # a truncated or padded file would misread records, so it is refused up front
+        if len(self._mmap) != HEADER.size + count * self._record_size:
+            self._mmap.close()
+            raise ValueError(f"{path} is not the size its header says, so it is corrupt")
+
+    def __enter__(self) -> "PackedCorpus":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes the memory map."""
+        self._mmap.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def geometry(self) -> Geometry:
+        """Returns the geometry of the puzzles in the file."""
+        return self._geometry
+
+    @property
+    def has_solutions(self) -> bool:
+        """Returns True if the records hold solutions and givens masks."""
+        return bool(self._givens_bytes)
+
+    def _record(self, index: int) -> tuple[bytes, int | None]:
+        """Returns the cells of a record as ASCII bytes and its givens mask, if any."""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("Puzzle index out of range")
+        start = HEADER.size + index * self._record_size
+        cells = _unpack(self._mmap[start : start + self._cell_bytes], self._geometry)
+        if not self._givens_bytes:
+            return cells, None
+        start += self._cell_bytes
+        return cells, int.from_bytes(self._mmap[start : start + self._givens_bytes], "big")
+
+    def bitboards(self, index: int) -> tuple[int, ...]:
+        """Returns the bitboard values of the puzzle at the index, in the order
+        Board.snapshot returns them, without building a Board.
+        """
+        cells, givens = self._record(index)
+        values = bitboards_from_bytes(cells, self._geometry)
+        if givens is None:
+            return values
+        full_mask = self._geometry.full_mask
+        return (full_mask & ~givens, *(value & givens for value in values[1:]))
+
+    def board(self, index: int) -> Board:
+        """Returns a board of the puzzle at the index."""
+        return Board.from_snapshot(self.bitboards(index))
+
+    def __getitem__(self, index: int) -> str:
+        """Returns the puzzle string at the index, with '.' for blanks."""
+        cells, givens = self._record(index)
+        cells = cells.decode("ascii")
+        if givens is not None:
+            kept = format(givens, "b").zfill(len(cells))
+            cells = "".join(
+                symbol if keep == "1" else "0" for symbol, keep in zip(cells, kept)
+            )
+        return cells.replace("0", ".")
+
+    def solution(self, index: int) -> str | None:
+        """Returns the solution string at the index, or None if the file has none."""
+        cells, givens = self._record(index)
+        return None if givens is None else cells.decode("ascii")
+
+    def puzzles(self, start: int = 0, stop: int | None = None) -> Iterator[str]:
+        """Yields the puzzle strings from index start up to stop."""
+        stop = self._count if stop is None else min(stop, self._count)
+        for index in range(start, stop):
+            yield self[index]
+
+    def __iter__(self) -> Iterator[str]:
+        return self.puzzles()
+
+
+def _solved(puzzles: Iterable[str]) -> Iterator[tuple[str, str]]:
+    """Yields each puzzle with its solution, skipping puzzles with no solution and
+    saying so on stderr.
+    """
+    for puzzle in puzzles:
+        board = Board.from_string(puzzle)
+        if DancingLinksSolution(board).solve():
+            yield puzzle, board.to_string()
+        else:
+            print(f"skipped unsolvable puzzle {puzzle}", file=sys.stderr)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Packs a text corpus into a packed file. Returns the exit code."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("source", help="text file of puzzles, one per line")
+    parser.add_argument("destination", help="packed file to write")
+    parser.add_argument(
+        "--solve",
+        action="store_true",
+        help="store solutions and givens masks as well, skipping unsolvable puzzles",
+    )
+    args = parser.parse_args(argv)
+
+    # imported here since the loader reads packed files through this module
+    from loader import load_puzzles  # pylint: disable=import-outside-toplevel
+
+    puzzles = load_puzzles(args.source)
+    solutions = None
+    if args.solve:
+        # write_packed takes one solution per puzzle, so the two copies of the pairs
+        # are read in step and tee only ever holds one pair
+        puzzle_pairs, solution_pairs = tee(_solved(puzzles))
+        puzzles = (puzzle for puzzle, _ in puzzle_pairs)
+        solutions = (solution for _, solution in solution_pairs)
+    count = write_packed(args.destination, puzzles, solutions)
+    print(f"{count} puzzles written to {args.destination}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
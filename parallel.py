@@ -0,0 +1,222 @@
+"""Functions for solving a single hard puzzle faster by searching its subtrees in parallel.
+
+The search tree of the puzzle is expanded breadth first down to a frontier, and
+each board on the frontier is handed to a pool of worker processes as a snapshot
+of its bitboards. As soon as one worker finds a solution the others are cancelled;
+when counting solutions the counts of the subtrees are added up instead.
+
+    python parallel.py PUZZLE
+    python parallel.py --workers 1 2 4 --engine mrv --count PUZZLE
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import closing
+from typing import Iterator
+
+from batch import ENGINES
+from bitboard import Board
+from dancing_links import DancingLinksSolution, count_solutions
+from limits import CancellationToken, SolveInterrupted, SolveLimits
+
+# the frontier is split into a few subtrees per worker, since subtrees vary a lot
+# in size and a worker that finishes early can then take another one
+SUBTREES_PER_WORKER = 4
+
+# set in each worker process by _start_worker, shared by every worker of a pool
+_TOKEN = None
+
+
+def split(board, depth: int | None = None, subtrees: int = 1) -> list[tuple[int, ...]]:
+    """Returns snapshots (see Board.snapshot) of the boards on the frontier of the
+    search tree of the board. The tree is expanded a level at a time, branching on
+    the empty cell with the fewest candidates, until the frontier holds at least
+    subtrees boards or is depth levels down. Branches with a cell that has no
+    candidates are dropped and full boards are kept as they are, so the solutions
+    of the subtrees are exactly the solutions of the board. The board is not changed.
+    """
+    frontier = [board.snapshot()]
+    level = 0
+    while frontier and len(frontier) < subtrees and (depth is None or level < depth):
+        expanded = []
+        grew = False
+        for snapshot in frontier:
+            node = Board.from_snapshot(snapshot)
+            cell = node.most_constrained_cell()
+            if cell is None:
+                expanded.append(snapshot)
+                continue
+            grew = True
+            candidates = node.candidates(cell)
+            while candidates:
+                bit = candidates & -candidates
+                candidates ^= bit
+                mark = node.checkpoint()
+                node.fill_cell(cell, bit.bit_length())
+                expanded.append(node.snapshot())
+                node.rollback(mark)
+        frontier = expanded
+        level += 1
+        if not grew:
+            break
+    return frontier
+
+
+def _start_worker(event) -> None:
+    """Shares the cancellation event of the pool with a worker process."""
+    global _TOKEN  # pylint: disable=global-statement
+    _TOKEN = CancellationToken(event)
+
+
+def _limits() -> SolveLimits | None:
+    """Returns limits that stop a search once the pool is cancelled, if in a worker."""
+    return None if _TOKEN is None else SolveLimits(token=_TOKEN)
+
+
+def _solve_subtree(snapshot: tuple[int, ...], engine) -> list[int] | None:
+    """Solves the board of a subtree, returning its cells or None if it has no solution
+    or the search was cancelled.
+    """
+    board = Board.from_snapshot(snapshot)
+    result = engine(board).solve_instrumented(limits=_limits())
+    return board.to_list() if result.solved else None
+
+
+def _count_subtree(snapshot: tuple[int, ...], limit: int | None) -> int:
+    """Counts the solutions of the board of a subtree, up to limit."""
+    try:
+        return count_solutions(Board.from_snapshot(snapshot), limit, _limits())
+    except SolveInterrupted:
+        return 0
+
+
+def _map_subtrees(function, snapshots: list, workers: int, *args) -> Iterator:
+    """Yields function(snapshot, *args) for every subtree as each one finishes.
+    Once the caller stops iterating, the workers still searching are cancelled and
+    the subtrees not yet started are dropped. With workers=1 no pool is started.
+    """
+    if workers == 1:
+        for snapshot in snapshots:
+            yield function(snapshot, *args)
+        return
+
+    context = multiprocessing.get_context()
+    event = context.Event()
+    with ProcessPoolExecutor(
+        workers, mp_context=context, initializer=_start_worker, initargs=(event,)
+    ) as executor:
+        futures = [executor.submit(function, snapshot, *args) for snapshot in snapshots]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            event.set()
+            for future in futures:
+                future.cancel()
+
+
+def solve_parallel(
+    board,
+    workers: int | None = None,
+    depth: int | None = None,
+    engine=DancingLinksSolution,
+) -> bool:
+    """Fills in the empty cells of the board by searching its subtrees across a pool
+    of worker processes with the engine. Returns True if a solution was found,
+    otherwise the board is left as it was and False is returned. Unless depth is
+    given, the tree is split into SUBTREES_PER_WORKER subtrees per worker.
+    """
+    if board.has_conflicts():
+        return False
+    workers = workers or os.cpu_count() or 1
+    frontier = split(board, depth, workers * SUBTREES_PER_WORKER)
+    with closing(_map_subtrees(_solve_subtree, frontier, workers, engine)) as results:
+        for cells in results:
+            if cells is not None:
+                for cell, number in enumerate(cells):
+                    if board.cell_is_empty(cell):
+                        board.fill_cell(cell, number)
+                return True
+    return False
+
+
+def count_parallel(
+    board,
+    limit: int | None = 2,
+    workers: int | None = None,
+    depth: int | None = None,
+) -> int:
+    """Returns how many solutions the board has, like count_solutions, counting the
+    subtrees across a pool of worker processes and adding up their counts. The
+    workers are cancelled as soon as the total reaches limit.
+    """
+    if board.has_conflicts():
+        return 0
+    workers = workers or os.cpu_count() or 1
+    frontier = split(board, depth, workers * SUBTREES_PER_WORKER)
+    total = 0
+    with closing(_map_subtrees(_count_subtree, frontier, workers, limit)) as counts:
+        for count in counts:
+            total += count
+            if limit is not None and total >= limit:
+                return limit
+    return total
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Times one puzzle with a growing number of workers and reports the speedup
+    against solving it in a single process without splitting. Returns the exit code.
+    """
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("puzzle", help="puzzle string, '.' or '0' for blanks")
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1})
+    )
+    parser.add_argument("--depth", type=int, default=None, help="frontier depth")
+    parser.add_argument("--engine", choices=ENGINES, default="dancing_links")
+    parser.add_argument("--count", action="store_true", help="count every solution")
+    args = parser.parse_args(argv)
+    engine = ENGINES[args.engine]
+
+    def run(workers: int | None) -> tuple[float, object]:
+        """Returns the time taken and the answer, solving in process if workers is None."""
+        board = Board.from_string(args.puzzle)
+        start = time.perf_counter()
+        if args.count:
+            if workers is None:
+                answer = count_solutions(board, limit=None)
+            else:
+                answer = count_parallel(board, None, workers, args.depth)
+        else:
+            if workers is None:
+                solved = engine(board).solve()
+            else:
+                solved = solve_parallel(board, workers, args.depth, engine)
+            answer = board.to_string() if solved else None
+        return time.perf_counter() - start, answer
+
+    baseline, answer = run(None)
+    print(f"cpus available: {os.cpu_count()}")
+    print(f"{'workers':>7} {'subtrees':>8} {'seconds':>9} {'speedup':>8}")
+    print(f"{'-':>7} {'-':>8} {baseline:>9.3f} {1.0:>8.2f}")
+    for workers in args.workers:
+        subtrees = len(
+            split(Board.from_string(args.puzzle), args.depth, workers * SUBTREES_PER_WORKER)
+        )
+        elapsed, parallel_answer = run(workers)
+        if args.count and parallel_answer != answer:
+            print(f"count mismatch: {parallel_answer} != {answer}", file=sys.stderr)
+            return 1
+        print(f"{workers:>7} {subtrees:>8} {elapsed:>9.3f} {baseline / elapsed:>8.2f}")
+    print(f"answer: {answer}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,372 @@
+"""Classes for reducing a sudoku puzzle with logical deductions before searching."""
+
+from bitboard import unit_cover
+from solution import Solution, MinimumRemainingValuesSolution
+
+TECHNIQUES = (
+    "naked_single",
+    "hidden_single",
+    "naked_pair",
+    "hidden_pair",
+    "pointing",
+    "box_line",
+)
+
+
+class Propagator:
+    """Applies naked singles, hidden singles, naked pairs, hidden pairs, pointing and
+    box/line reduction to a board until none of them change anything.
+    The techniques are tried cheapest first, and after any of them makes progress
+    we start again from the top, so that the cheap ones always run first.
+    Units are numbered 0-26: rows are 0-8, columns are 9-17 and squares are 18-26,
+    and the same way on larger boards (see Geometry).
+    """
+
+    def __init__(self, board) -> None:
+        self._board = board
+        self._geometry = board.geometry
+        self.techniques = dict.fromkeys(TECHNIQUES, 0)
+        # checked once per round of techniques, see SolveLimits
+        self.limits = None
+
+    def propagate(self) -> bool:
+        """Runs every technique until a fixpoint is reached. Returns False if the board
+        was found to contain a contradiction, True otherwise.
+        """
+        techniques = (
+            self._naked_singles,
+            self._hidden_singles,
+            self._naked_pairs,
+            self._hidden_pairs,
+            self._pointing,
+            self._box_line,
+        )
+        if self._board.has_conflicts():
+            return False
+        while True:
+            if self.limits is not None:
+                self.limits.tick()
+            for technique in techniques:
+                progress = technique()
+                if progress is None:
+                    return False
+                if progress:
+                    break
+            else:
+                return True
+
+    @property
+    def solved(self) -> bool:
+        """Returns True if every cell of the board is filled."""
+        return not any(
+            self._board.cell_is_empty(cell) for cell in range(self._geometry.cell_count)
+        )
+
+    def _positions(self, unit: int, number: int) -> list[int]:
+        """Returns the cells of the unit that have the number as a candidate."""
+        bit = 1 << (number - 1)
+        return [
+            cell
+            for cell in self._geometry.unit_indices[unit]
+            if self._board.candidates(cell) & bit
+        ]
+
+    def _naked_singles(self) -> bool | None:
+        """Fills every empty cell that has only one candidate.
+        Returns None if an empty cell has no candidates.
+        """
+        progress = False
+        for cell in range(self._geometry.cell_count):
+            if not self._board.cell_is_empty(cell):
+                continue
+            mask = self._board.candidates(cell)
+            if not mask:
+                return None
+            if not mask & (mask - 1):
+                self._board.fill_cell(cell, mask.bit_length())
+                self.techniques["naked_single"] += 1
+                progress = True
+        return progress
+
+    def _hidden_singles(self) -> bool | None:
+        """Fills a cell if it is the only place in a unit that a number can go.
+        Returns None if a number missing from a unit has nowhere to go.
+        """
+        progress = False
+        for unit in range(self._geometry.unit_count):
+            for number in range(1, self._geometry.size + 1):
+                if self._board.unit_count(unit, number):
+                    continue
+                positions = self._positions(unit, number)
+                if not positions:
+                    return None
+                if len(positions) == 1:
+                    self._board.fill_cell(positions[0], number)
+                    self.techniques["hidden_single"] += 1
+                    progress = True
+        return progress
+
+    def _naked_pairs(self) -> bool:
+        """If two cells in a unit have the same two candidates, those numbers
+        can be removed from every other cell in the unit.
+        """
+        progress = False
+        for unit in range(self._geometry.unit_count):
+            cells = [
+                cell
+                for cell in self._geometry.unit_indices[unit]
+                if self._board.cell_is_empty(cell)
+            ]
+            pairs = {}
+            for cell in cells:
+                mask = self._board.candidates(cell)
+                if mask.bit_count() == 2:
+                    pairs.setdefault(mask, []).append(cell)
+            for mask, pair in pairs.items():
+                if len(pair) != 2:
+                    continue
+                for cell in cells:
+                    if cell not in pair and self._board.eliminate(cell, mask):
+                        self.techniques["naked_pair"] += 1
+                        progress = True
+        return progress
+
+    def _hidden_pairs(self) -> bool:
+        """If two numbers can only go in the same two cells of a unit, every other
+        candidate can be removed from those two cells.
+        """
+        progress = False
+        for unit in range(self._geometry.unit_count):
+            positions = {}
+            for number in range(1, self._geometry.size + 1):
+                if not self._board.unit_count(unit, number):
+                    cells = self._positions(unit, number)
+                    if len(cells) == 2:
+                        positions.setdefault(tuple(cells), []).append(number)
+            for cells, numbers in positions.items():
+                if len(numbers) != 2:
+                    continue
+                keep = (1 << (numbers[0] - 1)) | (1 << (numbers[1] - 1))
+                for cell in cells:
+                    if self._board.eliminate(cell, ~keep & self._geometry.all_candidates):
+                        self.techniques["hidden_pair"] += 1
+                        progress = True
+        return progress
+
+    def _pointing(self) -> bool:
+        """If a number can only go in one row or column of a square, it can be
+        removed from the rest of that row or column.
+        """
+        progress = False
+        size = self._geometry.size
+        for square in range(2 * size, 3 * size):
+            for number in range(1, size + 1):
+                cells = self._positions(square, number)
+                if len(cells) < 2:
+                    continue
+                for line in (0, 1):
+                    units = {self._geometry.cell_units[cell][line] for cell in cells}
+                    if len(units) == 1 and self._eliminate_outside(
+                        units.pop(), cells, number
+                    ):
+                        self.techniques["pointing"] += 1
+                        progress = True
+        return progress
+
+    def _box_line(self) -> bool:
+        """If a number can only go in one square along a row or column, it can be
+        removed from the rest of that square.
+        """
+        progress = False
+        for line in range(2 * self._geometry.size):
+            for number in range(1, self._geometry.size + 1):
+                cells = self._positions(line, number)
+                if len(cells) < 2:
+                    continue
+                squares = {self._geometry.cell_units[cell][2] for cell in cells}
+                if len(squares) == 1 and self._eliminate_outside(
+                    squares.pop(), cells, number
+                ):
+                    self.techniques["box_line"] += 1
+                    progress = True
+        return progress
+
+    def _eliminate_outside(self, unit: int, cells: list[int], number: int) -> bool:
+        """Removes the number from the candidates of the cells in the unit which are
+        not in cells. Returns True if any candidate was removed.
+        """
+        progress = False
+        bit = 1 << (number - 1)
+        for cell in self._geometry.unit_indices[unit]:
+            if cell not in cells and self._board.eliminate(cell, bit):
+                progress = True
+        return progress
+
+
+class BitslicedPropagator:
+    """Applies naked and hidden singles to a board until neither finds anything,
+    working a number at a time on whole bitboards instead of cell by cell.
+
+    For each number, the bitboard of the cells it can go in is the blank cells less
+    the rows, columns and squares it is already in (see Board.positions). A cell in
+    exactly one of those bitboards is a naked single, found for every cell at once
+    by ORing the bitboards together and keeping track of the cells seen twice. A
+    unit whose mask has exactly one bit of a number's bitboard left in it is a
+    hidden single. All the singles of a round are placed together, and only the
+    bitboards are updated between rounds; the cells are filled on the board once
+    the fixpoint is reached, and the board is left as it was on a contradiction.
+    It is the same interface as Propagator, with fewer techniques.
+    """
+
+    def __init__(self, board) -> None:
+        self._board = board
+        self._geometry = board.geometry
+        self.techniques = dict.fromkeys(TECHNIQUES[:2], 0)
+        # checked once per round of singles, see SolveLimits
+        self.limits = None
+
+    def propagate(self) -> bool:
+        """Places singles until there are none left. Returns False if the board was
+        found to contain a contradiction, True otherwise.
+        """
+        board = self._board
+        if board.has_conflicts():
+            return False
+        geometry = self._geometry
+        unit_masks = geometry.row_masks + geometry.column_masks + geometry.square_masks
+        blank, *given = board.snapshot()
+        placed = list(given)
+        positions = [board.positions(number) for number in range(1, geometry.size + 1)]
+        # the numbers whose positions have changed since their units were last checked
+        changed = set(range(geometry.size))
+
+        while blank:
+            if self.limits is not None:
+                self.limits.tick()
+
+            # cells in exactly one bitboard of positions are naked singles, and
+            # blank cells in none can't be filled at all
+            once = twice = 0
+            for cells in positions:
+                twice |= once & cells
+                once |= cells
+            if blank & ~once:
+                return False
+            naked = once & ~twice
+            found = [cells & naked for cells in positions]
+            self.techniques["naked_single"] += naked.bit_count()
+
+            # like Propagator, the units are only checked once the naked singles run
+            # out, and then only for the numbers that have changed
+            for index in () if naked else changed:
+                cells = positions[index]
+                if not cells:
+                    if placed[index].bit_count() != geometry.size:
+                        return False
+                    continue
+                for mask in unit_masks:
+                    bits = cells & mask
+                    if not bits:
+                        if not placed[index] & mask:
+                            return False
+                    elif not bits & (bits - 1):
+                        found[index] |= bits
+                        self.techniques["hidden_single"] += 1
+            if not naked:
+                changed.clear()
+
+            # a cell can only take one number, and a number only one cell of a unit
+            claimed = 0
+            for index, cells in enumerate(found):
+                if not cells:
+                    continue
+                if cells & claimed:
+                    return False
+                if cells & (cells - 1):
+                    for mask in unit_masks:
+                        bits = cells & mask
+                        if bits & (bits - 1):
+                            return False
+                claimed |= cells
+                placed[index] |= cells
+                positions[index] &= ~unit_cover(cells, geometry)
+            if not claimed:
+                break
+            blank &= ~claimed
+            for index, cells in enumerate(positions):
+                if cells & claimed or found[index]:
+                    positions[index] = cells & ~claimed
+                    changed.add(index)
+
+        board.fill_cells(
+            (number, cells & ~before)
+            for number, (cells, before) in enumerate(zip(placed, given), 1)
+        )
+        return True
+
+    @property
+    def solved(self) -> bool:
+        """Returns True if every cell of the board is filled."""
+        return not self._board.bitboard(0).decimal_value
+
+
+class PropagationSolution(Solution):
+    """Reduces the board with a Propagator, then hands whatever is left to a
+    search solver. If propagation fills the whole board, no search is done.
+    """
+
+    def __init__(self, board, search=MinimumRemainingValuesSolution, propagator=Propagator):
+        super().__init__(board)
+        self._propagator = propagator(board)
+        self._search = search(board)
+        self.searched = False
+
+    @property
+    def techniques(self) -> dict[str, int]:
+        """Returns how many times each technique fired during propagation."""
+        return self._propagator.techniques
+
+    def instrument(self, hook=None):
+        """Turns on stats collection, sharing the stats object with the search solver."""
+        stats = super().instrument(hook)
+        self._search.stats = stats
+        self._search._hook = hook
+        return stats
+
+    def _set_limits(self, limits) -> None:
+        """Sets the limits for propagation and passes them on to the search solver."""
+        super()._set_limits(limits)
+        self._propagator.limits = limits
+        self._search._set_limits(limits)
+
+    def _timed_solve(self) -> bool:
+        """Solves the board; propagation and search time themselves as separate phases."""
+        return self.solve()
+
+    def solve(self) -> bool:
+        """Fills in the empty cells of the board. Returns True if a solution was found."""
+        stats = self.stats
+        if stats is None:
+            consistent = self._propagator.propagate()
+        else:
+            with stats.phase("propagation"):
+                consistent = self._propagator.propagate()
+            stats.propagation_steps += sum(self.techniques.values())
+        if not consistent:
+            return False
+        if self._propagator.solved:
+            return True
+        self.searched = True
+        if stats is None:
+            return self._search.solve()
+        with stats.phase("search"):
+            return self._search.solve()
+
+
+class BitslicedSolution(PropagationSolution):
+    """Reduces the board with a BitslicedPropagator, then searches like
+    PropagationSolution.
+    """
+
+    def __init__(self, board, search=MinimumRemainingValuesSolution):
+        super().__init__(board, search, BitslicedPropagator)
@@ -0,0 +1,187 @@
+"""asyncio solving service that speaks JSON lines over TCP or a Unix socket.
+
+Each request is one line holding a JSON object:
+
+    {"id": 1, "puzzle": "8..........36...", "timeout": 1.0, "engine": "mrv"}
+
+Only "puzzle" is required. Each response is one line, written as soon as its
+puzzle is done, so responses can come back in a different order than the
+requests were sent. The "id" field of the request is copied into the response:
+
+    {"id": 1, "status": "solved", "solution": "812753649...", "nodes": 3673,
+     "seconds": 0.058}
+
+status is one of the SolveResult statuses, or "error" with an "error" message.
+Puzzles are solved in a pool of worker processes. Once max_pending puzzles are
+in flight, a connection with a request waiting stops being read until one
+finishes, so clients are slowed down by TCP flow control instead of the server
+queueing without bound. A request line too long for the stream reader gets an
+"error" response and the connection is closed.
+
+    python server.py --port 8765 --workers 4
+    python server.py --unix /tmp/sudoku.sock
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from batch import ENGINES
+from bitboard import Board
+from limits import SolveLimits
+
+DEFAULT_ENGINE = "dancing_links"
+
+# 9x9, 16x16 and 25x25 puzzles
+PUZZLE_LENGTHS = (81, 256, 625)
+
+# extra time allowed for a worker to notice its own timeout before giving up on it
+TIMEOUT_GRACE = 1.0
+
+
+def solve_request(puzzle: str, engine: str, timeout: float | None) -> dict:
+    """Solves one puzzle in a worker process and returns the response fields."""
+    result = ENGINES[engine](Board.from_string(puzzle)).solve_instrumented(
+        limits=SolveLimits(timeout=timeout)
+    )
+    return {
+        "status": result.status,
+        "solution": result.solution,
+        "nodes": result.stats.nodes,
+        "seconds": round(result.stats.total_time, 6),
+    }
+
+
+class SolverServer:
+    """Accepts connections, reads requests, and hands the puzzles to a process pool."""
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        max_pending: int | None = None,
+        default_timeout: float | None = 10.0,
+    ) -> None:
+        self._workers = workers or os.cpu_count() or 1
+        self._executor = None
+        self._pending = asyncio.Semaphore(max_pending or self._workers * 8)
+        self._default_timeout = default_timeout
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, path: str | None = None):
+        """Serves until cancelled, on a Unix socket if a path is given, else on TCP."""
+        with ProcessPoolExecutor(self._workers) as executor:
+            self._executor = executor
+            if path is not None:
+                server = await asyncio.start_unix_server(self._handle, path=path)
+            else:
+                server = await asyncio.start_server(self._handle, host, port)
+            async with server:
+                await server.serve_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Reads requests from one connection until it closes, answering each one from
+        its own task so that responses stream back as puzzles finish.
+        """
+        tasks = set()
+        lock = asyncio.Lock()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # the line is longer than the reader's limit, so the stream can't
+                    # be kept in step with the requests; answer it and hang up
+                    response = {"id": None, "status": "error", "error": "request too long"}
+                    async with lock:
+                        writer.write(json.dumps(response).encode() + b"\n")
+                        await writer.drain()
+                    break
+                if not line:
+                    break
+                # wait for room before sending the puzzle to the pool, and only read
+                # the next request once there is some, so a busy server pushes back
+                # on clients; idle connections hold no permit
+                await self._pending.acquire()
+                task = asyncio.create_task(self._answer(line, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                # released however the task ends, even if cancelled before it starts
+                task.add_done_callback(self._release)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    def _release(self, _task: asyncio.Task) -> None:
+        """Gives back the permit taken for a request once its task is done."""
+        self._pending.release()
+
+    async def _answer(self, line: bytes, writer: asyncio.StreamWriter, lock: asyncio.Lock) -> None:
+        """Solves the puzzle in one request line and writes the response."""
+        response = await self._solve(line)
+        async with lock:
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+
+    async def _solve(self, line: bytes) -> dict:
+        """Returns the response for one request line."""
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            puzzle = request["puzzle"]
+            engine = request.get("engine", DEFAULT_ENGINE)
+            timeout = request.get("timeout", self._default_timeout)
+            if not isinstance(puzzle, str) or len(puzzle) not in PUZZLE_LENGTHS:
+                raise ValueError("puzzle must be an 81, 256 or 625 character string")
+            if engine not in ENGINES:
+                raise ValueError(f"unknown engine {engine!r}")
+            if timeout is not None and (
+                isinstance(timeout, bool)
+                or not isinstance(timeout, (int, float))
+                or not 0 < timeout < math.inf
+            ):
+                raise ValueError("timeout must be a number of seconds greater than 0")
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            return {"id": request_id, "status": "error", "error": str(error)}
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, solve_request, puzzle, engine, timeout)
+        try:
+            wait = None if timeout is None else timeout + TIMEOUT_GRACE
+            response = await asyncio.wait_for(future, wait)
+        except asyncio.TimeoutError:
+            response = {"status": "timeout", "solution": None}
+        except Exception as error:  # pylint: disable=broad-except
+            response = {"status": "error", "error": str(error)}
+        return {"id": request_id, **response}
+
+
+def main() -> None:
+    """Runs the server from the command line."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-pending", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=10.0, help="default seconds per puzzle")
+    args = parser.parse_args()
+
+    server = SolverServer(args.workers, args.max_pending, args.timeout)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 """Class for finding a solution to a sudoku puzzle."""
 
-from enums import Cells, Numbers
+from limits import SolveInterrupted, SolveLimits
+from stats import Hook, SolveResult, SolveStats
 
 
 class Solution:
@@ -8,6 +9,93 @@ class Solution:
 
     def __init__(self, board):
         self._board = board
+        # stats collection is off unless instrument is called, and every counter
+        # update is guarded by a single check of self.stats
+        self.stats = None
+        self._hook = None
+        # likewise there are no limits unless solve_instrumented is given some
+        self._limits = None
+
+    def instrument(self, hook: Hook | None = None) -> SolveStats:
+        """Turns on stats collection for this solver and returns the stats object it
+        will fill in. The optional hook is called as hook(event, cell, number, depth)
+        for the "place", "backtrack" and "solved" search events.
+        """
+        self.stats = SolveStats()
+        self._hook = hook
+        return self.stats
+
+    def solve_instrumented(
+        self, hook: Hook | None = None, limits: SolveLimits | None = None
+    ) -> SolveResult:
+        """Solves the board with stats collection turned on and returns the result.
+        If limits are given and one of them is hit, the search stops, the board is
+        put back the way it was, and the result says why it stopped.
+        """
+        stats = self.instrument(hook)
+        empty_cells = [
+            cell
+            for cell in range(self._board.geometry.cell_count)
+            if self._board.cell_is_empty(cell)
+        ]
+        depth = self._board.checkpoint_depth
+        self._set_limits(limits)
+        try:
+            if limits is not None:
+                limits.start()
+            solved = self._timed_solve()
+        except SolveInterrupted as interruption:
+            if self._board.checkpoint_depth > depth:
+                self._board.rollback(depth)
+            for cell in empty_cells:
+                self._board.fill_cell(cell, 0)
+            return SolveResult(interruption.reason, None, stats)
+        finally:
+            self._set_limits(None)
+        if not solved:
+            return SolveResult("unsolvable", None, stats)
+        return SolveResult("solved", self._board.to_string(), stats)
+
+    def _set_limits(self, limits: SolveLimits | None) -> None:
+        """Sets the limits the search checks. Solvers that delegate to another
+        solver pass them on.
+        """
+        self._limits = limits
+
+    def _timed_solve(self) -> bool:
+        """Solves the board, timing it as the search phase."""
+        with self.stats.phase("search"):
+            return self.solve()
+
+    def _record(self, event: str, cell: int, number: int, depth: int) -> None:
+        """Updates the stats for a search event and passes it on to the hook.
+        Only called when stats collection is on.
+        """
+        stats = self.stats
+        if event == "place":
+            stats.nodes += 1
+            if depth > stats.max_depth:
+                stats.max_depth = depth
+        elif event == "backtrack":
+            stats.backtracks += 1
+        if self._hook is not None:
+            self._hook(event, cell, number, depth)
+
+    def solve(self) -> bool:
+        """Fills in the empty cells of the board. Returns True if a solution was found."""
+        raise NotImplementedError
+
+    def solve_blank_board(self):
+        """Finds a solution to a board with nothing filled in."""
+        self.solve_board_with_hints()
+
+    def solve_board_with_hints(self):
+        """Finds a solution to a puzzle with some cells already filled in."""
+        if self.solve():
+            self._board.print_board()
+            print("Puzzle solved.\n")
+        else:
+            print("Puzzle has no solution.\n")
 
     @staticmethod
     def solve_last_cell(numbers: set[int]) -> int:
@@ -20,17 +108,12 @@ class Solution:
         """Returns a set of candidate numbers for a cell. It does not take anything into account
         other than if the cell, row, column, or square already contains that number.
         """
-        cell = list(Cells)[cell]
-        candidates = set()
-        for number in Numbers:
-            if (
-                self._board.bitboard(number.value).not_in_cell(cell.value)
-                and self._board.bitboard(number.value).not_in_row(cell.row)
-                and self._board.bitboard(number.value).not_in_column(cell.column)
-                and self._board.bitboard(number.value).not_in_square(cell.square)
-            ):
-                candidates.add(number.value)
-        return candidates
+        mask = self._board.candidates(cell)
+        return {
+            number
+            for number in range(1, self._board.geometry.size + 1)
+            if mask & (1 << (number - 1))
+        }
 
     def find_single_candidate_solutions(self) -> dict[int, int]:
         """Returns a dictionary of cell indices as keys and solutions as values.
@@ -38,11 +121,11 @@ class Solution:
         contain one number, then that number is the solution for the cell.
         """
         solutions = {}
-        for cell in Cells:
-            if self._board.cell_is_empty(cell.value):
-                candidates = self._find_candidates(cell.value)
-                if len(candidates) == 1:
-                    solutions[cell.value] = candidates.pop()
+        for cell in range(self._board.geometry.cell_count):
+            mask = self._board.candidates(cell)
+            # a mask with exactly one bit on means the cell has a single candidate
+            if mask and not mask & (mask - 1):
+                solutions[cell] = mask.bit_length()
         return solutions
 
 
@@ -63,11 +146,12 @@ class BruteForceSolution(Solution):
         cell = 0
         number = 1
         previous_cell_value = 0
+        last_number = self._board.geometry.size
         while not solved:
             if self._board.cell_is_empty(cell):  # check if cell is empty
                 # loop through the numbers, looking for a valid one
                 cell_is_solved = False
-                while number < 10:
+                while number <= last_number:
                     if self._board.cell_can_contain(cell, number):
                         # fill the cell if the number was valid, then continue to the next cell
                         self._board.fill_cell(cell, number)
@@ -94,7 +178,7 @@ class BruteForceSolution(Solution):
             # self._board.print_board()
 
             # terminal case
-            if cell == 81:
+            if cell == self._board.geometry.cell_count:
                 solved = True
                 self._board.print_board()
                 print("Puzzle solved.\n")
@@ -104,18 +188,27 @@ class BruteForceSolution(Solution):
         already filled in (hints).
         """
         cells_to_solve = []
-        for cell in Cells:
-            if self._board.cell_is_empty(cell.value):
-                cells_to_solve.append(cell.value)
+        for cell in range(self._board.geometry.cell_count):
+            if self._board.cell_is_empty(cell):
+                cells_to_solve.append(cell)
         return cells_to_solve
 
-    def solve_board_with_hints(self):
-        """Finds a solution to a puzzle with some cells already filled in."""
+    def solve(self) -> bool:
+        """Finds a solution to a puzzle with some cells already filled in, without
+        printing anything. Returns True once the board is solved.
+        """
         solved = False
         i = 0
+        if self._board.has_conflicts():
+            return False
         cells = self._get_cells_to_solve()
+        if not cells:
+            return True
         number = 1
         previous_cell_value = 0
+        last_number = self._board.geometry.size
+        stats = self.stats
+        limits = self._limits
         while not solved:
             # we have to get the cell since we don't want to overwrite a hinted cell
             cell = cells[i]
@@ -123,10 +216,16 @@ class BruteForceSolution(Solution):
             if self._board.cell_is_empty(cell):  # check if cell is empty
                 # loop through the numbers, looking for a valid one
                 cell_is_solved = False
-                while number < 10:
+                while number <= last_number:
+                    if stats is not None:
+                        stats.checks += 1
                     if self._board.cell_can_contain(cell, number):
                         # fill the cell if the number was valid, then continue to the next cell
                         self._board.fill_cell(cell, number)
+                        if stats is not None:
+                            self._record("place", cell, number, i + 1)
+                        if limits is not None:
+                            limits.tick()
                         previous_cell_value = number
                         cell_is_solved = True
                         break
@@ -138,6 +237,9 @@ class BruteForceSolution(Solution):
                     # To backup, we need to remember what number it currently is, and start
                     # with the next number. The cell needs to be blank so that the algorithm tries to
                     # solve it.
+                    if i == 0:
+                        # every number has been tried in the first cell, so there is no solution
+                        return False
                     number = 1 + previous_cell_value
                     previous_cell = cells[i - 1]
                     previous_previous_cell = cells[i - 2]
@@ -145,6 +247,8 @@ class BruteForceSolution(Solution):
                         previous_previous_cell
                     )
                     self._board.fill_cell(previous_cell, 0)
+                    if stats is not None:
+                        self._record("backtrack", previous_cell, 0, i)
                     i -= 1
                     continue
 
@@ -155,5 +259,65 @@ class BruteForceSolution(Solution):
             # terminal case
             if cell == cells[-1]:
                 solved = True
-                self._board.print_board()
-                print("Puzzle solved.\n")
+                if stats is not None:
+                    self._record("solved", cell, number, i)
+        return solved
+
+
+class MinimumRemainingValuesSolution(Solution):
+    """This class implements a depth first search which always branches on the empty
+    cell with the fewest candidates (minimum remaining values).
+    The algorithm works as follows:
+    1. Find the empty cell with the fewest candidates.
+    2. If there are no empty cells, the puzzle is solved.
+    3. If that cell has no candidates, the current board cannot be solved, so fail early.
+    4. Otherwise, try each candidate in turn and search again from the new board.
+    5. If no candidate leads to a solution, blank the cell and back up.
+    """
+
+    def _candidate_order(self, cell: int) -> list[int]:
+        """Returns the candidates of the cell in the order they should be tried,
+        lowest first. Subclasses can override this to search in a different order.
+        """
+        candidates = self._board.candidates(cell)
+        numbers = []
+        while candidates:
+            # take the lowest candidate off the mask
+            bit = candidates & -candidates
+            candidates ^= bit
+            numbers.append(bit.bit_length())
+        return numbers
+
+    def solve(self) -> bool:
+        """Fills in the empty cells of the board. Returns True if a solution was found,
+        otherwise the board is left as it was and False is returned.
+        """
+        if self._board.has_conflicts():
+            return False
+        return self._search(1)
+
+    def _search(self, depth: int) -> bool:
+        """Recursively fills the most constrained cell, rolling the board back to a
+        checkpoint whenever a candidate turns out to be a dead end.
+        """
+        stats = self.stats
+        cell = self._board.most_constrained_cell()
+        if cell is None:
+            if stats is not None:
+                self._record("solved", -1, 0, depth - 1)
+            return True
+
+        for number in self._candidate_order(cell):
+            mark = self._board.checkpoint()
+            self._board.fill_cell(cell, number)
+            if stats is not None:
+                self._record("place", cell, number, depth)
+            if self._limits is not None:
+                self._limits.tick()
+            if self._search(depth + 1):
+                self._board.commit(mark)
+                return True
+            self._board.rollback(mark)
+            if stats is not None:
+                self._record("backtrack", cell, number, depth)
+        return False
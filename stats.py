@@ -0,0 +1,85 @@
+"""Classes for collecting statistics about how a solver found its solution."""
+
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+# hook(event, cell, number, depth), called for "place", "backtrack" and "solved"
+Hook = Callable[[str, int, int, int], None]
+
+
+class SolveStats:
+    """Counters filled in by a solver while stats collection is turned on.
+
+    nodes: cells tried, i.e. placements made while searching
+    checks: calls to Board.cell_can_contain
+    backtracks: placements undone because they led to a dead end
+    max_depth: the deepest the search went, in placements
+    propagation_steps: deductions made by constraint propagation
+    phase_times: wall time in seconds spent in each phase, like "search"
+    """
+
+    __slots__ = (
+        "nodes",
+        "checks",
+        "backtracks",
+        "max_depth",
+        "propagation_steps",
+        "phase_times",
+    )
+
+    def __init__(self) -> None:
+        self.nodes = 0
+        self.checks = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.propagation_steps = 0
+        self.phase_times = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Adds the wall time spent inside the with block to the named phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phase_times[name] = self.phase_times.get(name, 0.0) + elapsed
+
+    @property
+    def total_time(self) -> float:
+        """Returns the wall time in seconds spent in every phase."""
+        return sum(self.phase_times.values())
+
+    def to_dict(self) -> dict:
+        """Returns the counters as a plain dict, for reports and JSON."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        counters = ", ".join(f"{name}={value}" for name, value in self.to_dict().items())
+        return f"<SolveStats {counters}>"
+
+
+class SolveResult:
+    """What a solve returns when stats collection is turned on: the status, the
+    solution as an 81 character string (None unless solved), and the stats, which
+    are partial if the solve was interrupted.
+
+    status is "solved", "unsolvable", or, if a limit stopped the search,
+    "timeout", "node_limit" or "cancelled".
+    """
+
+    __slots__ = ("status", "solution", "stats")
+
+    def __init__(self, status: str, solution: str | None, stats: SolveStats) -> None:
+        self.status = status
+        self.solution = solution
+        self.stats = stats
+
+    @property
+    def solved(self) -> bool:
+        """Returns True if a solution was found."""
+        return self.status == "solved"
+
+    def __repr__(self) -> str:
+        return f"<SolveResult status={self.status} {self.stats}>"
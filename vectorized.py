@@ -0,0 +1,147 @@
+"""Functions for propagating and solving many sudoku puzzles at once with NumPy.
+
+The puzzles are held as an (N, 81) array of digits in the order of the puzzle
+strings, and naked and hidden singles are applied to every board in the batch
+with array operations. Only boards that stall are handed to a Board based solver.
+NumPy is an optional dependency and is only needed to use this module.
+"""
+
+from typing import Iterable
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+from bitboard import Board
+from dancing_links import DancingLinksSolution
+from geometry import ALL_CANDIDATES, CELL_UNITS, UNIT_INDICES
+
+
+def _require_numpy() -> None:
+    """Raises an ImportError explaining that this module needs NumPy."""
+    if np is None:
+        raise ImportError("The vectorized engine requires numpy to be installed.")
+
+
+if np is not None:
+    # positions in the puzzle string are 80 - cell, see Cells
+    _UNITS = np.array([[80 - cell for cell in unit] for unit in UNIT_INDICES])
+    _CELL_UNITS = np.array([CELL_UNITS[80 - position] for position in range(81)])
+    _BITS = np.array([0] + [1 << (digit - 1) for digit in range(1, 10)], dtype=np.uint16)
+    _POPCOUNT = np.array([bin(mask).count("1") for mask in range(512)], dtype=np.uint8)
+    # maps a candidate mask with one bit on to its digit, and anything else to 0
+    _SINGLE = np.zeros(512, dtype=np.uint8)
+    for _digit in range(1, 10):
+        _SINGLE[1 << (_digit - 1)] = _digit
+
+
+def to_array(puzzles: Iterable[str]) -> "np.ndarray":
+    """Returns an (N, 81) uint8 array of the digits of the puzzle strings, 0 for blanks.
+    Raises ValueError for a puzzle that isn't 81 characters of '.' and 0-9, like
+    Board.from_string.
+    """
+    _require_numpy()
+    puzzles = list(puzzles)
+    for puzzle in puzzles:
+        if len(puzzle) != 81:
+            raise ValueError(f"Invalid puzzle length {len(puzzle)}")
+    data = "".join(puzzles).replace(".", "0")
+    try:
+        digits = np.frombuffer(data.encode("ascii"), dtype=np.uint8) - ord("0")
+    except UnicodeEncodeError:
+        digits = None
+    if digits is None or (digits > 9).any():
+        symbol = next(symbol for symbol in data if symbol not in "0123456789")
+        raise ValueError(f"Invalid symbol {symbol!r}")
+    return digits.reshape(-1, 81)
+
+
+def to_strings(grids: "np.ndarray", blank: str = ".") -> list[str]:
+    """Returns the puzzle strings for an (N, 81) array of digits."""
+    _require_numpy()
+    text = (grids.astype(np.uint8) + ord("0")).tobytes().decode("ascii")
+    if blank != "0":
+        text = text.replace("0", blank)
+    return [text[i : i + 81] for i in range(0, len(text), 81)]
+
+
+def _candidates(grids: "np.ndarray") -> tuple["np.ndarray", "np.ndarray"]:
+    """Returns the (N, 81) candidate masks of the grids, and a boolean array that is
+    True for every grid with a repeated digit in a unit.
+    """
+    placed = _BITS[grids]
+    in_units = placed[:, _UNITS]
+    unit_used = np.bitwise_or.reduce(in_units, axis=2)
+    repeated = (_POPCOUNT[unit_used] != (in_units != 0).sum(axis=2)).any(axis=1)
+    cell_used = np.bitwise_or.reduce(unit_used[:, _CELL_UNITS], axis=2)
+    candidates = np.where(grids == 0, ALL_CANDIDATES & ~cell_used, 0).astype(np.uint16)
+    return candidates, repeated
+
+
+def propagate(grids: "np.ndarray") -> tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Applies naked and hidden singles to every grid until none of them change.
+    Every single found in a round is placed at once; that is sound because every
+    solution has to agree with all of them.
+
+    Returns the propagated grids, and two boolean arrays that are True for the grids
+    which were solved and for the grids which were found to have no solution.
+    Grids that are neither have stalled and need searching.
+    """
+    _require_numpy()
+    grids = np.array(grids, dtype=np.uint8)
+    solved = np.zeros(len(grids), dtype=bool)
+    dead = np.zeros(len(grids), dtype=bool)
+    active = np.arange(len(grids))
+
+    while len(active):
+        current = grids[active]
+        candidates, repeated = _candidates(current)
+        empty = current == 0
+
+        # an empty cell with no candidates, or a unit with a missing digit that has
+        # nowhere to go, means there is no solution
+        stuck = repeated | (empty & (candidates == 0)).any(axis=1)
+        in_units = candidates[:, _UNITS]
+        unit_filled = np.bitwise_or.reduce(_BITS[current][:, _UNITS], axis=2)
+        unit_possible = np.bitwise_or.reduce(in_units, axis=2)
+        stuck |= ((unit_filled | unit_possible) != ALL_CANDIDATES).any(axis=1)
+
+        # naked singles
+        updated = np.where(empty, _SINGLE[candidates], current)
+
+        # hidden singles, one digit at a time across every unit of every grid
+        for digit in range(9):
+            has_digit = (in_units >> digit) & 1
+            rows, units = np.nonzero(has_digit.sum(axis=2) == 1)
+            positions = _UNITS[units, has_digit[rows, units].argmax(axis=1)]
+            updated[rows, positions] = digit + 1
+
+        changed = (updated != current).any(axis=1) & ~stuck
+        full = ~(updated == 0).any(axis=1)
+        grids[active] = np.where(stuck[:, None], current, updated)
+
+        dead[active[stuck]] = True
+        # a grid that was filled this round still has to be checked for repeats
+        finished = full & ~changed & ~stuck
+        solved[active[finished]] = True
+        active = active[changed]
+    return grids, solved, dead
+
+
+def solve_batch(puzzles: Iterable[str], engine=DancingLinksSolution) -> list[str | None]:
+    """Solves puzzle strings in one batch and returns the solved strings, or None for
+    the puzzles with no solution. Boards that propagation leaves unfinished are
+    solved one by one with the engine.
+    """
+    grids, solved, dead = propagate(to_array(puzzles))
+    results = []
+    for puzzle, is_solved, is_dead in zip(to_strings(grids), solved, dead):
+        if is_dead:
+            results.append(None)
+        elif is_solved:
+            results.append(puzzle)
+        else:
+            board = Board.from_string(puzzle)
+            results.append(board.to_string() if engine(board).solve() else None)
+    return results